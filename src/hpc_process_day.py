@@ -1,5 +1,6 @@
 # hpc_process_day.py - Updated for timestamped file structure and rsync storage
 import argparse
+import io
 import psycopg2
 import pandas as pd
 import tarfile
@@ -15,6 +16,10 @@ import gc
 from typing import List, Dict, Tuple
 
 from storage_manager import create_storage_manager
+# The full metadata column list lives with the bulk loader; parquet names
+# already match the database columns, so no per-batch rename mapping is
+# needed on this side either
+from metadata_process import METADATA_COLUMNS
 
 torch.backends.cuda.matmul.allow_tf32 = True
 torch.backends.cudnn.allow_tf32 = True
@@ -361,14 +366,10 @@ class HPCTimestampedAudioProcessor:
         # Process metadata
         if metadata_files:
             try:
-                # Read all metadata files into single dataframe
-                metadata_dfs = []
-                for f in metadata_files:
-                    try:
-                        df = pd.read_parquet(f)
-                        metadata_dfs.append(df)
-                    except Exception as e:
-                        logger.error(f"Failed to read {f.name}: {e}")
+                # Read metadata files concurrently - each read is independent
+                # and pd.read_parquet releases the GIL inside pyarrow, so
+                # threads overlap IO and decompression across files
+                metadata_dfs = self._read_parquet_files(metadata_files)
                 
                 if metadata_dfs:
                     combined_metadata = pd.concat(metadata_dfs, ignore_index=True)
@@ -383,13 +384,7 @@ class HPCTimestampedAudioProcessor:
         # Process comments similarly
         if comments_files:
             try:
-                comments_dfs = []
-                for f in comments_files:
-                    try:
-                        df = pd.read_parquet(f)
-                        comments_dfs.append(df)
-                    except Exception as e:
-                        logger.error(f"Failed to read {f.name}: {e}")
+                comments_dfs = self._read_parquet_files(comments_files)
                 
                 if comments_dfs:
                     combined_comments = pd.concat(comments_dfs, ignore_index=True)
@@ -401,38 +396,46 @@ class HPCTimestampedAudioProcessor:
             except Exception as e:
                 logger.error(f"Failed to process comments: {e}")
     
+    def _read_parquet_files(self, files: list) -> list:
+        """Read parquet files concurrently, skipping unreadable ones"""
+        dfs = []
+        with ThreadPoolExecutor(max_workers=min(8, len(files))) as executor:
+            for f, future in [(f, executor.submit(pd.read_parquet, f)) for f in files]:
+                try:
+                    dfs.append(future.result())
+                except Exception as e:
+                    logger.error(f"Failed to read {f.name}: {e}")
+        return dfs
+    
     def _store_metadata_batch(self, metadata_df: pd.DataFrame):
         """Store metadata in database"""
-        # Map DataFrame columns to database columns
-        column_mapping = {
-            'meta_id': 'meta_id',
-            'author_id': 'author_id',
-            'author_nickname': 'author_nickname',
-            'stats_playcount': 'stats_playcount',
-            # Add all other mappings...
-        }
-        
-        # Rename columns
-        metadata_df = metadata_df.rename(columns=column_mapping)
-        
+        # Keep only the columns we store; names already match the database
+        keep = [col for col in METADATA_COLUMNS if col in metadata_df.columns]
+        metadata_df = metadata_df[keep]
+
         # Add date columns
         metadata_df['year'] = self.year
         metadata_df['month'] = self.month
         metadata_df['date'] = self.day
         
-        # Store in database
+        # Store in database via COPY - multi-row INSERTs plateau around
+        # 1000-row pages, server-side COPY is the faster bulk path
+        columns_str = ', '.join(metadata_df.columns)
+        buf = io.StringIO()
+        metadata_df.to_csv(buf, index=False, header=False, na_rep='\\N')
+        buf.seek(0)
+
         try:
-            metadata_df.to_sql(
-                'audio_metadata',
-                self.db,
-                if_exists='append',
-                index=False,
-                method='multi',
-                chunksize=1000
-            )
+            with self.db.cursor() as cur:
+                cur.copy_expert(
+                    f"COPY audio_metadata ({columns_str}) FROM STDIN WITH (FORMAT CSV, NULL '\\N')",
+                    buf
+                )
+            self.db.commit()
             logger.info(f"Stored {len(metadata_df)} metadata records")
         except Exception as e:
             logger.error(f"Failed to store metadata: {e}")
+            self.db.rollback()
     
     
     def _update_processing_stats(self):
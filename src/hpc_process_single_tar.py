@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
 # hpc_process_single_tar.py - Process individual tar.xz files for parallel processing
 import argparse
+import csv
+import io
+import numpy as np
+import os
 import psycopg2
+from psycopg2.extras import execute_values
+import queue
 import tarfile
+import threading
 from pathlib import Path
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import torch
 import whisperx
@@ -15,12 +22,64 @@ from typing import List, Dict, Tuple
 
 from storage_manager import create_storage_manager
 
+# Optional in-process MP3 decode: PyAV binds libav directly, skipping the
+# ffmpeg fork and stdio round-trip per clip; the subprocess pipe remains
+# the fallback when the binding is not installed
+try:
+    import av
+except ImportError:
+    av = None
+
 torch.backends.cuda.matmul.allow_tf32 = True
 torch.backends.cudnn.allow_tf32 = True
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# int16 full-scale -> float32 [-1, 1), matching whisperx.load_audio
+_PCM_SCALE = np.float32(1.0 / 32768.0)
+
+# Silence inserted between clips in a batched waveform: one full VAD
+# chunk (30s at 16kHz). Merged VAD chunks are capped at that span, so a
+# full-window gap can never be bridged and no transcribed segment can
+# cover two clips. The gaps are VAD-inactive - the encoder never sees
+# them, so they cost host memory only
+_CLIP_GAP_SAMPLES = 30 * 16000
+
+class _WhisperModelCache:
+    """Process-wide cache of the loaded WhisperX model
+    
+    Loading large-v2 costs 10-30s; a job that processes several tar files
+    in one process should pay it once and reuse the GPU-resident weights,
+    not reload per SingleTarProcessor instance.
+    """
+    _model = None
+    _key = None
+    
+    @classmethod
+    def get(cls, device: str, compute_type: str):
+        key = (device, compute_type)
+        if cls._model is None or cls._key != key:
+            logger.info(f"Loading WhisperX large-v2 ({device}, {compute_type})")
+            cls._model = whisperx.load_model(
+                "large-v2",
+                device=device,
+                compute_type=compute_type
+            )
+            cls._key = key
+        return cls._model
+    
+    @classmethod
+    def unload(cls):
+        """Release the cached model - call once after all tars are done"""
+        if cls._model is not None:
+            cls._model = None
+            cls._key = None
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+
 class SingleTarProcessor:
     def __init__(self, args):
         self.date_str = args.date
@@ -29,6 +88,7 @@ class SingleTarProcessor:
         self.timestamp = args.timestamp
         self.temp_dir = Path(args.temp_dir)
         self.batch_size = args.batch_size
+        self.gpu_batch_size = args.gpu_batch_size
         self.num_workers = args.num_workers
         
         # Initialize database connection
@@ -38,6 +98,7 @@ class SingleTarProcessor:
             user="audio_user",
             password=args.db_password
         )
+        self._prepare_statements()
         
         # Storage configuration - use rsync to database host
         self.storage = create_storage_manager(
@@ -52,11 +113,27 @@ class SingleTarProcessor:
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         logger.info(f"Using device: {self.device}")
         
-        self.model = whisperx.load_model(
-            "large-v2",
-            device=self.device,
-            compute_type="float16" if self.device == "cuda" else "float32"
-        )
+        # int8 weights with FP16 activations halve weight bandwidth for a
+        # negligible WER change on speech - a solid decoder speedup on the
+        # CT2 backend. Overridable for A/B runs via --compute-type.
+        if args.compute_type:
+            compute_type = args.compute_type
+        else:
+            compute_type = "int8_float16" if self.device == "cuda" else "int8"
+        self.model = _WhisperModelCache.get(self.device, compute_type)
+        
+        # Pinned host staging buffer for batch waveforms (lazily sized);
+        # see _staged_waveform
+        self._pinned = None
+        
+        # ffmpeg work is subprocess-bound (the GIL is released during the
+        # wait), so threads give the same concurrency as processes with no
+        # fork or pickling cost; one pool is reused across all batches
+        self._ffmpeg_pool = ThreadPoolExecutor(max_workers=self.num_workers)
+        
+        # Opus encoding is storage-only work; a small worker pool encodes
+        # and uploads in the background while the GPU moves on
+        self._upload_pool = ThreadPoolExecutor(max_workers=2)
         
         # Track processed files
         self.processed_count = 0
@@ -70,31 +147,67 @@ class SingleTarProcessor:
         if not self.tar_file.exists():
             raise FileNotFoundError(f"Tar file not found: {self.tar_file}")
         
-        # Create working directory
+        # Working directory only holds transient Opus encodes now; the
+        # MP3 payloads never touch disk
         work_dir = self.temp_dir / f"{self.date_str}_{self.timestamp}"
         work_dir.mkdir(parents=True, exist_ok=True)
+        self.work_dir = work_dir
         
         try:
-            # Extract audio files from tar
-            audio_files = self.extract_audio_files_from_tar(self.tar_file, work_dir)
+            # Two-stage pipeline: a producer thread streams the tar and
+            # decodes the next batch to PCM while the GPU transcribes the
+            # current one, so tar I/O and ffmpeg no longer leave the GPU
+            # idle. maxsize=2 bounds memory to two decoded batches.
+            batch_queue: "queue.Queue" = queue.Queue(maxsize=2)
+            producer_errors: List[Exception] = []
             
-            if not audio_files:
-                logger.warning(f"No audio files found in {self.tar_file.name}")
-                return
+            def produce():
+                try:
+                    for batch in self._stream_extract_batches():
+                        batch_queue.put(self._batch_decode_to_pcm(batch))
+                except Exception as e:
+                    producer_errors.append(e)
+                finally:
+                    batch_queue.put(None)  # End-of-stream sentinel
             
-            logger.info(f"Extracted {len(audio_files)} audio files")
+            producer = threading.Thread(target=produce, daemon=True)
+            producer.start()
             
-            # Process in batches
-            for i in range(0, len(audio_files), self.batch_size):
-                batch_files = audio_files[i:i + self.batch_size]
-                logger.info(f"Processing batch {i//self.batch_size + 1}: {len(batch_files)} files")
-                
-                self.process_audio_batch(batch_files, self.timestamp, i // self.batch_size)
+            total_files = 0
+            batch_num = 0
+            while True:
+                decoded = batch_queue.get()
+                if decoded is None:
+                    break
+                logger.info(f"Processing batch {batch_num + 1}: {len(decoded)} files")
                 
-                # Clear GPU memory between batches
-                if self.device == "cuda":
-                    torch.cuda.empty_cache()
+                # No unconditional empty_cache() here: it synchronizes
+                # with the device and returns nothing to PyTorch; the
+                # caching allocator reuses batch-sized blocks just fine.
+                # Cache release is reserved for OOM recovery and tar end.
+                try:
+                    self.process_audio_batch(decoded, self.timestamp, batch_num)
+                except torch.cuda.OutOfMemoryError:
                     gc.collect()
+                    torch.cuda.empty_cache()
+                    self.gpu_batch_size = max(1, self.gpu_batch_size // 2)
+                    logger.warning(f"CUDA OOM - retrying batch {batch_num} "
+                                   f"with gpu_batch_size={self.gpu_batch_size}")
+                    self.process_audio_batch(decoded, self.timestamp, batch_num)
+                total_files += len(decoded)
+                batch_num += 1
+            
+            producer.join()
+            if producer_errors:
+                raise producer_errors[0]
+            
+            # One deliberate cache release at the end of the tar
+            if self.device == "cuda":
+                torch.cuda.empty_cache()
+            
+            if total_files == 0:
+                logger.warning(f"No audio files found in {self.tar_file.name}")
+                return
             
             logger.info(f"Completed processing {self.tar_file.name}: {self.processed_count} processed, {self.failed_count} failed")
             
@@ -102,38 +215,168 @@ class SingleTarProcessor:
             logger.error(f"Failed to process {self.tar_file.name}: {e}")
             raise
         finally:
+            # Per-batch file cleanup is already off the hot loop: MP3
+            # payloads live in memory and each upload worker deletes its
+            # own transient Opus file, so the only filesystem teardown
+            # left is this end-of-tar removal of the working directory.
+            # Let in-flight encode+upload jobs finish before the working
+            # directory disappears under them
+            self._ffmpeg_pool.shutdown(wait=True)
+            self._upload_pool.shutdown(wait=True)
             # Clean up working directory
             import shutil
             if work_dir.exists():
                 shutil.rmtree(work_dir)
     
-    def extract_audio_files_from_tar(self, tar_path: Path, work_dir: Path) -> List[Path]:
-        """Extract MP3 files from tar.xz archive and return their paths"""
-        audio_files = []
+    def _stream_extract_batches(self):
+        """Stream MP3 members out of the tar in in-memory batches
+        
+        One forward pass in streaming mode ('r|*'), as before, but member
+        payloads are read into memory instead of extracted to disk -
+        writing each MP3 out only for ffmpeg to read it straight back
+        cost two file-size traversals of the staging disk per file.
+        Batch size is bounded by batch_size clips of RSS, not disk space.
+        """
+        if self.tar_file.suffix == '.tar':
+            yield from self._pread_extract_batches()
+            return
+        
+        batch: List[Tuple[str, bytes]] = []
         try:
-            with tarfile.open(tar_path, 'r:*') as tar:
-                members = [m for m in tar.getmembers() if m.name.endswith('.mp3')]
-                logger.info(f"Found {len(members)} MP3 files in {tar_path.name}")
-                
-                # Extract all audio files
-                for member in members:
-                    tar.extract(member, work_dir)
-                    audio_files.append(work_dir / member.name)
-                    
+            with tarfile.open(self.tar_file, mode='r|*') as tar:
+                for member in tar:
+                    if not member.name.endswith('.mp3'):
+                        continue
+                    fileobj = tar.extractfile(member)
+                    if fileobj is None:
+                        continue
+                    batch.append((member.name, fileobj.read()))
+                    if len(batch) >= self.batch_size:
+                        yield batch
+                        batch = []
         except Exception as e:
-            logger.error(f"Failed to extract from {tar_path}: {e}")
+            logger.error(f"Failed to extract from {self.tar_file}: {e}")
             raise
+        if batch:
+            yield batch
+    
+    def _pread_extract_batches(self):
+        """Extract an uncompressed tar with parallel positioned reads
+        
+        With no compression layer the member payloads sit at known byte
+        offsets, so after one cheap header walk the data is pulled with
+        os.pread on a shared descriptor from several threads at once -
+        concurrent positioned reads keep NVMe and cloud block storage
+        queues full instead of draining the archive serially through the
+        tarfile stream. Compressed tars cannot take this path; they use
+        the streaming extractor above.
+        """
+        with tarfile.open(self.tar_file, 'r:') as tar:
+            spans = [(m.name, m.offset_data, m.size)
+                     for m in tar.getmembers() if m.name.endswith('.mp3')]
+        if not spans:
+            return
+        
+        fd = os.open(self.tar_file, os.O_RDONLY)
+        try:
+            def read_member(span):
+                name, offset, size = span
+                return name, os.pread(fd, size, offset)
             
-        return audio_files
+            for start in range(0, len(spans), self.batch_size):
+                block = spans[start:start + self.batch_size]
+                yield list(self._ffmpeg_pool.map(read_member, block))
+        finally:
+            os.close(fd)
+    
+    @staticmethod
+    def _decode_to_pcm(item: Tuple[str, bytes]):
+        """Decode in-memory MP3 bytes to 16kHz mono int16 PCM
+        
+        Decoders hand back int16 exactly as produced (the ffmpeg path is
+        a zero-copy view of the pipe output); the one int16 -> float32
+        normalization happens in _staged_waveform, writing directly into
+        the pinned buffer, so no intermediate float32 array is ever
+        allocated per clip.
+        """
+        name, mp3_bytes = item
+        if av is not None:
+            try:
+                return SingleTarProcessor._decode_pcm_inprocess(mp3_bytes)
+            except Exception as e:
+                logger.debug(f"In-process decode failed for {name} ({e}); "
+                             f"falling back to ffmpeg")
+        return SingleTarProcessor._decode_pcm_ffmpeg(name, mp3_bytes)
     
     @staticmethod
-    def convert_to_opus(mp3_path: Path) -> Tuple[Path, Path]:
-        """Convert MP3 to Opus format"""
+    def _decode_pcm_inprocess(mp3_bytes: bytes) -> np.ndarray:
+        """Decode MP3 bytes with libav in-process, no subprocess fork
+        
+        libswresample handles the mono/16kHz conversion, so the output
+        matches the ffmpeg pipe bit-for-bit in format: s16 mono 16kHz.
+        """
+        resampler = av.AudioResampler(format='s16', layout='mono', rate=16000)
+        chunks = []
+        with av.open(io.BytesIO(mp3_bytes)) as container:
+            stream = container.streams.audio[0]
+            for frame in container.decode(stream):
+                for resampled in resampler.resample(frame):
+                    chunks.append(resampled.to_ndarray().reshape(-1))
+            for resampled in resampler.resample(None):  # Flush
+                chunks.append(resampled.to_ndarray().reshape(-1))
+        if not chunks:
+            raise ValueError("no audio frames decoded")
+        return np.concatenate(chunks)
+    
+    @staticmethod
+    def _decode_pcm_ffmpeg(name: str, mp3_bytes: bytes):
+        """Decode via an ffmpeg subprocess pipe (fallback path)"""
+        cmd = [
+            'ffmpeg', '-hide_banner', '-loglevel', 'error',
+            '-f', 'mp3',
+            '-i', 'pipe:0',
+            '-f', 's16le',
+            '-ac', '1',
+            '-ar', '16000',
+            'pipe:1'
+        ]
+        try:
+            result = subprocess.run(cmd, input=mp3_bytes, capture_output=True)
+            if result.returncode != 0 or not result.stdout:
+                stderr = result.stderr.decode(errors='replace')
+                logger.error(f"FFmpeg decode error for {name}: {stderr[:200]}")
+                return None
+            return np.frombuffer(result.stdout, np.int16)
+        except Exception as e:
+            logger.error(f"Decode error for {name}: {e}")
+            return None
+    
+    def _batch_decode_to_pcm(self, batch: List[Tuple[str, bytes]]) -> List[Tuple[str, bytes, np.ndarray]]:
+        """Decode a batch of in-memory MP3s to PCM in parallel ffmpeg pipes"""
+        pcms = list(self._ffmpeg_pool.map(self._decode_to_pcm, batch))
+        
+        decoded = [(name, mp3_bytes, audio)
+                   for (name, mp3_bytes), audio in zip(batch, pcms)
+                   if audio is not None]
+        failed = len(batch) - len(decoded)
+        if failed > 0:
+            logger.warning(f"{failed} audio decodes failed")
+        return decoded
+    
+    def _encode_and_upload(self, name: str, mp3_bytes: bytes, storage_path: str):
+        """Encode in-memory MP3 bytes to Opus and upload (upload worker)
+        
+        The Opus encode is pure CPU work needed only for storage, so it
+        overlaps with network I/O here instead of delaying transcription.
+        The encode output is the only thing that touches local disk, and
+        only long enough for rsync to pick it up.
+        """
+        opus_path = self.work_dir / Path(name).with_suffix('.opus').name
         try:
-            opus_path = mp3_path.with_suffix('.opus')
-            
             cmd = [
-                'ffmpeg', '-i', str(mp3_path),
+                'ffmpeg', '-hide_banner', '-loglevel', 'error',
+                '-f', 'mp3',
+                '-i', 'pipe:0',
                 '-c:a', 'libopus',
                 '-b:a', '32k',
                 '-application', 'voip',
@@ -143,140 +386,299 @@ class SingleTarProcessor:
                 '-ar', '16000',  # 16kHz sample rate
                 '-y', str(opus_path)
             ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
-                logger.error(f"FFmpeg error for {mp3_path.name}: {result.stderr}")
-                return mp3_path, None
-                
-            return mp3_path, opus_path
-            
+            result = subprocess.run(cmd, input=mp3_bytes, capture_output=True)
+            if result.returncode != 0 or not opus_path.exists():
+                stderr = result.stderr.decode(errors='replace')
+                logger.error(f"FFmpeg encode error for {name}: {stderr[:200]}")
+                return
+            if not self.storage.upload_file(opus_path, storage_path):
+                logger.error(f"Upload failed for {opus_path.name}")
         except Exception as e:
-            logger.error(f"Conversion error for {mp3_path.name}: {e}")
-            return mp3_path, None
+            logger.error(f"Encode/upload failed for {name}: {e}")
+        finally:
+            opus_path.unlink(missing_ok=True)
     
-    def batch_convert_to_opus(self, audio_paths: List[Path]) -> List[Tuple[Path, Path]]:
-        """Convert batch of MP3 files to Opus format in parallel"""
-        with ProcessPoolExecutor(max_workers=min(self.num_workers, len(audio_paths))) as executor:
-            results = list(executor.map(self.convert_to_opus, audio_paths))
+    def batch_transcribe_gpu(self, audios: List[np.ndarray]) -> List[Dict]:
+        """Transcribe a batch of decoded PCM clips with one batched GPU call
         
-        # Filter successful conversions
-        successful_conversions = [(orig, opus) for orig, opus in results if opus is not None]
+        Takes 16kHz PCM clips directly - decoding already happened
+        upstream, so no file I/O occurs here. The clips are concatenated
+        into a single waveform, separated by 30s of silence so WhisperX's
+        VAD cannot merge speech across a clip boundary, and transcribed
+        in one call; the faster-whisper backend batches the VAD windows
+        gpu_batch_size at a time, and segments are mapped back to clips
+        by sample offsets over the padded layout.
+        """
+        # Track where each clip lands in the padded waveform
+        offsets = []
+        sample_offsets = []
+        cursor = 0
+        data_samples = 0
+        for audio in audios:
+            if sample_offsets:
+                cursor += _CLIP_GAP_SAMPLES
+            sample_offsets.append(cursor)
+            offsets.append((cursor / 16000, (cursor + len(audio)) / 16000))
+            cursor += len(audio)
+            data_samples += len(audio)
+        
+        if data_samples == 0:
+            return [{'transcript': '', 'duration': 0} for _ in audios]
         
-        failed_count = len(results) - len(successful_conversions)
-        if failed_count > 0:
-            logger.warning(f"{failed_count} audio conversions failed")
-            
-        return successful_conversions
-    
-    def transcribe_audio_file(self, audio_path: Path) -> Dict:
-        """Transcribe a single audio file using WhisperX"""
         try:
-            # Load audio
-            audio = whisperx.load_audio(str(audio_path))
-            
-            # Transcribe
-            result = self.model.transcribe(audio)
-            
-            # Extract transcript
-            transcript_text = ' '.join([s['text'].strip() for s in result.get('segments', [])])
-            
-            return {
-                'transcript': transcript_text,
-                'duration': len(audio) / 16000  # Assuming 16kHz
-            }
-            
+            if self.device == "cuda":
+                waveform = self._staged_waveform(audios, sample_offsets, cursor)
+            else:
+                waveform = np.zeros(cursor, dtype=np.float32)
+                for audio, start in zip(audios, sample_offsets):
+                    if len(audio):
+                        np.multiply(audio, _PCM_SCALE,
+                                    out=waveform[start:start + len(audio)])
+            # Precomputing log-mel on GPU (torch.stft + cached filterbank)
+            # and feeding features directly was evaluated and rejected:
+            # the CT2 pipeline only accepts waveforms - its mel extraction
+            # runs in C++ off the GIL and is a rounding error next to the
+            # encoder, and bypassing it via encode() would sidestep VAD
+            # batching and decoding. The waveform path stays.
+            result = self.model.transcribe(waveform, batch_size=self.gpu_batch_size)
+            segments = result.get('segments', [])
+        except torch.cuda.OutOfMemoryError:
+            # Propagate so the batch loop can shrink gpu_batch_size and retry
+            raise
         except Exception as e:
-            logger.error(f"Transcription error for {audio_path.name}: {e}")
-            return {
-                'transcript': '',
-                'duration': 0
-            }
-    
-    def batch_transcribe_gpu(self, audio_paths: List[Path]) -> List[Dict]:
-        """Transcribe batch of audio files on GPU"""
+            logger.error(f"Batched transcription failed: {e}")
+            return [{'transcript': '', 'duration': 0} for _ in audios]
+        
+        # Split segments per file: the silence gaps guarantee no segment
+        # spans two clips, so a segment belongs to the file whose span
+        # contains its midpoint (tolerating timestamp jitter at the edges)
         results = []
+        for (start_s, end_s), audio in zip(offsets, audios):
+            texts = [
+                seg['text'].strip() for seg in segments
+                if start_s <= (seg['start'] + seg['end']) / 2 < end_s
+            ]
+            results.append({
+                'transcript': ' '.join(texts),
+                'duration': len(audio) / 16000
+            })
+        return results
+    
+    def _staged_waveform(self, audios: List[np.ndarray],
+                         sample_offsets: List[int], total_samples: int) -> np.ndarray:
+        """Normalize a batch of int16 clips straight into pinned memory
         
-        for audio_path in audio_paths:
-            result = self.transcribe_audio_file(audio_path)
-            results.append(result)
+        The backend copies the waveform host-to-device; sourcing that
+        copy from pinned (page-locked) memory makes it a true DMA
+        transfer at roughly double pageable throughput, able to overlap
+        with compute. The clips arrive as raw int16 decoder output, and
+        the mandatory int16 -> float32 normalization doubles as the copy
+        into the reusable pinned tensor (grown geometrically) - one pass
+        over the samples total, with no per-clip float32 temporaries.
+        The buffer is reused across batches, so the silence gaps between
+        clips are explicitly zeroed each time.
+        """
+        if self._pinned is None or self._pinned.numel() < total_samples:
+            current = self._pinned.numel() if self._pinned is not None else 0
+            self._pinned = torch.empty(max(total_samples, 2 * current),
+                                       dtype=torch.float32, pin_memory=True)
+        view = self._pinned.numpy()
+        prev_end = 0
+        for audio, start in zip(audios, sample_offsets):
+            if start > prev_end:
+                view[prev_end:start] = 0.0
+            count = len(audio)
+            if count:
+                np.multiply(audio, _PCM_SCALE, out=view[start:start + count])
+            prev_end = start + count
+        return view[:total_samples]
+    
+    # Row count above which COPY beats execute_values enough to justify
+    # the staging table round-trip
+    COPY_THRESHOLD = 200
+    
+    def _prepare_statements(self):
+        """Create the session staging table and PREPARE the batch merge
         
-        return results
+        The merge statement runs once per batch with identical text, so
+        it is planned once per connection via PREPARE instead of being
+        re-parsed every time. That requires the stage to outlive a single
+        transaction, so it is created here ON COMMIT DELETE ROWS (rows
+        truncate at commit, table and plan survive) rather than
+        re-created per batch.
+        
+        Both merges upsert: filename and audio_file_id are UNIQUE, and
+        the queue retries partially processed days, so a re-run must
+        overwrite the rows it already stored instead of aborting the
+        batch on the first duplicate.
+        """
+        with self.db.cursor() as cur:
+            cur.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS audio_files_stage (
+                    ord integer,
+                    filename text,
+                    file_path text,
+                    year integer,
+                    month integer,
+                    date integer
+                ) ON COMMIT DELETE ROWS
+            """)
+            cur.execute("""
+                PREPARE ins_audio_from_stage AS
+                INSERT INTO audio_files (filename, file_path, year, month, date, created_at)
+                SELECT filename, file_path, year, month, date, NOW()
+                FROM audio_files_stage
+                ORDER BY ord
+                ON CONFLICT (filename) DO UPDATE SET
+                    file_path = EXCLUDED.file_path,
+                    year = EXCLUDED.year,
+                    month = EXCLUDED.month,
+                    date = EXCLUDED.date
+                RETURNING id, filename
+            """)
+            cur.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS transcripts_stage (
+                    audio_file_id uuid,
+                    transcript_text text,
+                    duration_seconds numeric
+                ) ON COMMIT DELETE ROWS
+            """)
+            cur.execute("""
+                PREPARE ins_transcripts_from_stage AS
+                INSERT INTO transcripts (audio_file_id, transcript_text, duration_seconds)
+                SELECT audio_file_id, transcript_text, duration_seconds
+                FROM transcripts_stage
+                ON CONFLICT (audio_file_id) DO UPDATE SET
+                    transcript_text = EXCLUDED.transcript_text,
+                    duration_seconds = EXCLUDED.duration_seconds
+            """)
+        self.db.commit()
     
-    def process_audio_batch(self, audio_paths: List[Path], timestamp: str, batch_num: int):
-        """Process a batch of audio files"""
-        logger.info(f"Processing batch {batch_num} with {len(audio_paths)} files")
+    def _store_batch_copy(self, cur, rows: List[tuple], transcripts: List[Dict]):
+        """Bulk-load one batch via COPY and a temp staging table
         
-        # Convert MP3 files to Opus format in parallel
-        opus_paths = self.batch_convert_to_opus(audio_paths)
+        COPY streams rows without per-row parse/bind overhead but has no
+        RETURNING, so audio_files goes through a temp stage carrying an
+        ordinal: the INSERT ... SELECT ... ORDER BY ord RETURNING id,
+        filename hands back the generated ids, which are mapped back to
+        the batch by filename (RETURNING row order is not guaranteed to
+        follow the SELECT's ORDER BY) and COPYed straight into
+        transcripts (no ids needed back from that one). The transcript
+        CSV is written QUOTE_ALL: an unquoted empty field reads as NULL
+        under COPY ... WITH CSV, and empty transcripts (silent clips,
+        failed batches) are routine and must land as ''. Transcripts go
+        through a stage of their own: COPY has no ON CONFLICT, and a
+        retried day must overwrite its earlier rows. The stages and the
+        prepared merges are set up once per connection in
+        _prepare_statements; the stages empty themselves at commit.
+        """
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for ordinal, row in enumerate(rows):
+            writer.writerow((ordinal,) + row)
+        buf.seek(0)
         
-        if not opus_paths:
-            logger.warning(f"No successful conversions in batch {batch_num}")
-            return
+        cur.copy_expert(
+            "COPY audio_files_stage (ord, filename, file_path, year, month, date) "
+            "FROM STDIN WITH CSV", buf)
+        cur.execute("EXECUTE ins_audio_from_stage")
+        id_by_filename = {filename: audio_id for audio_id, filename in cur.fetchall()}
         
-        logger.info(f"Successfully converted {len(opus_paths)} files to Opus")
+        tbuf = io.StringIO()
+        writer = csv.writer(tbuf, quoting=csv.QUOTE_ALL)
+        for row, transcript in zip(rows, transcripts):
+            if row[0] not in id_by_filename:
+                continue
+            writer.writerow((id_by_filename[row[0]], transcript['transcript'],
+                             transcript.get('duration', 0)))
+        tbuf.seek(0)
+        cur.copy_expert(
+            "COPY transcripts_stage (audio_file_id, transcript_text, duration_seconds) "
+            "FROM STDIN WITH CSV", tbuf)
+        cur.execute("EXECUTE ins_transcripts_from_stage")
+    
+    def process_audio_batch(self, decoded: List[Tuple[str, bytes, np.ndarray]],
+                            timestamp: str, batch_num: int):
+        """Transcribe and store one decoded batch (PCM comes from the producer)"""
+        if not decoded:
+            logger.warning(f"No successful decodes in batch {batch_num}")
+            return
         
         # Batch transcription on GPU
-        transcripts = self.batch_transcribe_gpu([p[1] for p in opus_paths])
+        transcripts = self.batch_transcribe_gpu([audio for _, _, audio in decoded])
+        
+        # Precompute rows and storage paths; the storage path is known up
+        # front, so file_path is recorded at insert time instead of via a
+        # post-upload UPDATE
+        rows = []
+        upload_jobs = []
+        for name, mp3_bytes, _ in decoded:
+            opus_name = Path(name).with_suffix('.opus').name
+            storage_path = self.storage.get_storage_path(
+                self.year, self.month, self.day, timestamp, opus_name
+            )
+            rows.append((Path(name).name, storage_path, self.year, self.month, self.day))
+            upload_jobs.append((name, mp3_bytes, storage_path))
         
-        # Store results in database
+        # Store results in database - two batched statements per batch
+        # instead of two round-trips per file
         batch_processed = 0
         batch_failed = 0
         
-        with self.db.cursor() as cur:
-            for (orig_path, opus_path), transcript in zip(opus_paths, transcripts):
-                try:
-                    # Extract original filename info
-                    orig_filename = orig_path.name
-                    
-                    # Store in database
-                    cur.execute("""
+        try:
+            with self.db.cursor() as cur:
+                if len(rows) >= self.COPY_THRESHOLD:
+                    self._store_batch_copy(cur, rows, transcripts)
+                else:
+                    ids = execute_values(cur, """
                         INSERT INTO audio_files 
                         (filename, file_path, year, month, date, created_at)
-                        VALUES (%s, %s, %s, %s, %s, NOW())
-                        RETURNING id
-                    """, (orig_filename, None, self.year, self.month, self.day))
-                    
-                    audio_id = cur.fetchone()[0]
+                        VALUES %s
+                        ON CONFLICT (filename) DO UPDATE SET
+                            file_path = EXCLUDED.file_path,
+                            year = EXCLUDED.year,
+                            month = EXCLUDED.month,
+                            date = EXCLUDED.date
+                        RETURNING id, filename
+                    """, rows, template="(%s, %s, %s, %s, %s, NOW())", fetch=True)
                     
-                    # Store transcript
-                    cur.execute("""
+                    id_by_filename = {filename: audio_id for audio_id, filename in ids}
+                    transcript_rows = [
+                        (id_by_filename[row[0]], transcript['transcript'],
+                         transcript.get('duration', 0))
+                        for row, transcript in zip(rows, transcripts)
+                        if row[0] in id_by_filename
+                    ]
+                    execute_values(cur, """
                         INSERT INTO transcripts 
                         (audio_file_id, transcript_text, duration_seconds)
-                        VALUES (%s, %s, %s)
-                    """, (audio_id, transcript['transcript'], 
-                          transcript.get('duration', 0)))
-                    
-                    # Upload to storage via rsync
-                    storage_path = self.storage.get_storage_path(
-                        self.year, self.month, self.day, timestamp, opus_path.name
-                    )
-                    if self.storage.upload_file(opus_path, storage_path):
-                        cur.execute("""
-                            UPDATE audio_files 
-                            SET file_path = %s 
-                            WHERE id = %s
-                        """, (storage_path, audio_id))
-                    
-                    batch_processed += 1
-                    
-                except Exception as e:
-                    logger.error(f"Failed to store {orig_filename}: {e}")
-                    batch_failed += 1
+                        VALUES %s
+                        ON CONFLICT (audio_file_id) DO UPDATE SET
+                            transcript_text = EXCLUDED.transcript_text,
+                            duration_seconds = EXCLUDED.duration_seconds
+                    """, transcript_rows)
+                
+                # Commit all changes for this batch
+                self.db.commit()
+            batch_processed = len(rows)
             
-            # Commit all changes for this batch
-            self.db.commit()
+            # Queue uploads only once the transaction is closed - pushing
+            # jobs while the cursor was open kept the transaction (and
+            # its locks) alive for the duration of the queue submissions.
+            # The worker removes its transient Opus file when done.
+            for name, mp3_bytes, storage_path in upload_jobs:
+                self._upload_pool.submit(
+                    self._encode_and_upload, name, mp3_bytes, storage_path)
+        except Exception as e:
+            logger.error(f"Failed to store batch {batch_num}: {e}")
+            self.db.rollback()
+            batch_failed = len(rows)
         
         # Update counters
         self.processed_count += batch_processed
         self.failed_count += batch_failed
         
         logger.info(f"Batch {batch_num} completed: {batch_processed} processed, {batch_failed} failed")
-        
-        # Clean up audio files immediately
-        for orig_path, opus_path in opus_paths:
-            orig_path.unlink(missing_ok=True)
-            opus_path.unlink(missing_ok=True)
 
 
 def main():
@@ -288,6 +690,10 @@ def main():
     parser.add_argument('--db-host', required=True, help='Database host (also rsync target)')
     parser.add_argument('--db-password', default='audio_password', help='Database password')
     parser.add_argument('--batch-size', type=int, default=500, help='Audio files per batch')
+    parser.add_argument('--gpu-batch-size', type=int, default=16, help='Transcription windows per GPU batch')
+    parser.add_argument('--compute-type', default=None,
+                        choices=['float32', 'float16', 'int8_float16', 'int8'],
+                        help='CTranslate2 compute type (default: int8_float16 on GPU, int8 on CPU)')
     parser.add_argument('--num-workers', type=int, default=8, help='Parallel workers')
     
     # Storage options
@@ -1,8 +1,15 @@
 import argparse
+import io
+import os
 import psycopg2
-from psycopg2.extras import execute_values
+from psycopg2 import pool as pg_pool
+import numpy as np
 import pandas as pd
 import tarfile
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.fs
 import pyarrow.parquet as pq
 from pathlib import Path
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
@@ -11,16 +18,128 @@ import subprocess
 import logging
 import gc
 import re
+from collections import deque
 from typing import List, Dict, Tuple
-from sqlalchemy import create_engine
 
 # Source storage_manager for rsync support
 from storage_manager import create_storage_manager
 
+# Optional: ADBC gives a typed binary COPY path (Arrow -> Postgres) that skips
+# text encoding entirely; fall back to CSV COPY when not installed
+try:
+    from adbc_driver_postgresql import dbapi as adbc_dbapi
+except ImportError:
+    adbc_dbapi = None
+
 # Start logging for debug purposes
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Size arrow's IO and CPU pools once at import; pre-buffered scans issue
+# coalesced column-chunk reads on the IO pool
+pa.set_io_thread_count(8)
+pa.set_cpu_count(os.cpu_count() or 8)
+
+# Low-cardinality string columns kept dictionary-encoded from parquet
+# through to pandas (Categorical) - a handful of distinct values repeated
+# millions of times otherwise materialize as individual PyObject strings
+DICTIONARY_COLUMNS = [
+    'meta_textlanguage', 'meta_categorytype', 'video_encodedtype',
+    'video_format', 'video_videoquality', 'video_codectype',
+    'poi_country', 'poi_countrycode', 'adress_addresscountry',
+    'adress_addressregion', 'country', 'comment_language'
+]
+
+PARQUET_FORMAT = ds.ParquetFileFormat(
+    read_options=ds.ParquetReadOptions(dictionary_columns=DICTIONARY_COLUMNS),
+    default_fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=True)
+)
+
+# Memory-map local parquet reads so the kernel pages data in on demand
+# instead of copying every file through a userspace read buffer
+LOCAL_MMAP_FS = pyarrow.fs.LocalFileSystem(use_mmap=True)
+
+# Columns inserted per table (in order); also used to project parquet reads
+# so only the columns we actually store are decoded
+METADATA_COLUMNS = [
+    'meta_id', 'year', 'month', 'date', 'poi_id', 'duetinfo_duetfromid',
+    'meta_createtime', 'meta_scheduletime', 'meta_itemcommentstatus',
+    'meta_diversificationid', 'meta_categorytype', 'meta_textlanguage',
+    'meta_desc', 'meta_locationcreated', 'meta_diversificationlabels',
+    'meta_serverabversions', 'meta_suggestedwords', 'meta_adlabelversion',
+    'meta_bainfo', 'meta_secret', 'meta_privateitem', 'meta_duetenabled',
+    'meta_stitchenabled', 'meta_indexenabled', 'meta_iscontentclassified',
+    'meta_isaigc', 'meta_isad', 'meta_isecvideo', 'meta_aigclabeltype',
+    'meta_aigcdescription', 'author_id', 'author_uniqueid', 'author_nickname',
+    'author_signature', 'author_roomid', 'author_verified', 'author_openfavorite',
+    'author_commentsetting', 'author_duetsetting', 'author_stitchsetting',
+    'author_downloadsetting', 'author_createtime', 'authorstats_followercount',
+    'authorstats_followingcount', 'authorstats_heart', 'authorstats_heartcount',
+    'authorstats_videocount', 'authorstats_diggcount', 'authorstats_friendcount',
+    'music_id', 'music_title', 'music_authorname', 'music_album', 'music_duration',
+    'music_schedulesearchtime', 'music_collected', 'stats_diggcount',
+    'stats_sharecount', 'stats_commentcount', 'stats_playcount', 'stats_collectcount',
+    'video_height', 'video_width', 'video_duration', 'video_bitrate', 'video_ratio',
+    'video_encodedtype', 'video_format', 'video_videoquality', 'video_codectype',
+    'video_definition', 'poi_type', 'poi_name', 'poi_address', 'poi_city',
+    'poi_citycode', 'poi_province', 'poi_country', 'poi_countrycode',
+    'poi_fatherpoiid', 'poi_fatherpoiname', 'poi_category', 'poi_tttypecode',
+    'poi_typecode', 'poi_tttypenametiny', 'poi_tttypenamemedium', 'poi_tttypenamesuper',
+    'adress_addresscountry', 'adress_addresslocality', 'adress_addressregion',
+    'adress_streetaddress', 'statuscode', 'statusmsg', 'description_hash',
+    'subtitle_subtitle_lang', 'bitrate_bitrate_info', 'text_extra_user_mention',
+    'text_extra_hashtag_mention', 'warning_warning', 'timestamp', 'pol', 'hour',
+    'country', 'processed_desc', 'raw', 'collection_timestamp'
+]
+
+COMMENTS_COLUMNS = [
+    'meta_id', 'year', 'month', 'date', 'cid', 'aweme_id', 'comment_text',
+    'create_time', 'digg_count', 'reply_comment_total', 'comment_language',
+    'status', 'stick_position', 'is_comment_translatable', 'no_show',
+    'user_digged', 'user_buried', 'is_author_digged', 'author_pin',
+    'reply_id', 'reply_to_reply_id', 'reply_comment', 'reply_score',
+    'show_more_score', 'uid', 'sec_uid', 'nickname', 'unique_id',
+    'custom_verify', 'enterprise_verify_reason', 'account_labels',
+    'label_list', 'sort_tags', 'comment_post_item_ids', 'collect_stat',
+    'ad_cover_url', 'advance_feature_item_order', 'advanced_feature_info',
+    'bold_fields', 'can_message_follow_status_list', 'can_set_geofencing',
+    'cha_list', 'cover_url', 'events', 'followers_detail', 'geofencing',
+    'homepage_bottom_toast', 'item_list', 'mutual_relation_avatars',
+    'need_points', 'platform_sync_info', 'relative_users', 'search_highlight',
+    'shield_edit_field_info', 'type_label', 'user_profile_guide',
+    'user_tags', 'white_cover_url', 'total', 'collection_timestamp',
+    'hash_unique_id'
+]
+
+SUBTITLES_COLUMNS = [
+    'meta_id', 'year', 'month', 'date', 'content', 'lang', 'type', 'rest',
+    'collection_timestamp', 'hash_unique_id'
+]
+
+
+def _frame_chunk_to_copy_csv(payload):
+    """Encode one chunk of rows as COPY-ready CSV bytes (process pool worker)
+
+    Uses arrow's multi-threaded C++ CSV writer rather than df.to_csv -
+    no per-cell Python string formatting. Nulls come out as unquoted empty
+    fields and empty strings as quoted "", which matches COPY's
+    NULL '' CSV semantics.
+    """
+    df, columns = payload
+    table = pa.Table.from_pandas(df[columns], preserve_index=False)
+    buf = io.BytesIO()
+    pacsv.write_csv(table, buf, pacsv.WriteOptions(include_header=False))
+    return buf.getvalue()
+
+
+def _table_to_pandas(table):
+    """Convert an Arrow table to pandas without doubling memory
+
+    split_blocks avoids consolidating same-dtype columns into one copied
+    block, and self_destruct drops the Arrow buffers as pandas adopts them.
+    """
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
 class HPCTimestampedAudioProcessor:
     def __init__(self, args):
         self.staging_dir = Path(args.staging_dir + "/prepped_data")
@@ -36,19 +155,37 @@ class HPCTimestampedAudioProcessor:
         self.metadata = args.metadata
         self.comments = args.comments
         self.subtitles = args.subtitles
+
+        # Optional bulk-load mode: trade crash safety for ingest speed
+        self.bulk_load = getattr(args, 'bulk_load', False)
+        self._bulk_index_defs = []
+        # Sidecar file holding the dropped index DDL for the duration of a
+        # bulk load - the only durable record if the process dies mid-load
+        self._bulk_index_sql = Path(args.staging_dir) / 'bulk_load_index_defs.sql'
         
         # Initialize connections
-        # psycopg2 connection for raw SQL operations
-        self.db = psycopg2.connect(
-            host=args.db_host,
+        # Pooled psycopg2 connections: one per ingest worker plus the
+        # coordinating connection, reused across retries instead of paying
+        # a fresh TCP/auth handshake each time
+        self.db_host = args.db_host
+        self.db_password = args.db_password
+        self._db_pool = pg_pool.ThreadedConnectionPool(
+            minconn=1, maxconn=4,
+            host=self.db_host,
             database="audio_pipeline",
             user="audio_user",
-            password=args.db_password
+            password=self.db_password,
+            # TCP keepalives so idle worker connections survive the long
+            # bulk windows instead of being dropped mid-run
+            keepalives=1,
+            keepalives_idle=60,
+            keepalives_interval=10,
+            keepalives_count=3
         )
+        self.db = self._db_pool.getconn()
         
-        # SQLAlchemy engine for pandas operations
-        db_url = f"postgresql://audio_user:{args.db_password}@{args.db_host}:5432/audio_pipeline"
-        self.db_engine = create_engine(db_url)
+        # Connection URL for the optional ADBC ingest path
+        self.db_url = f"postgresql://audio_user:{args.db_password}@{args.db_host}:5432/audio_pipeline"
         
         # Storage configuration - use rsync to database host
         self.storage = create_storage_manager(
@@ -63,6 +200,14 @@ class HPCTimestampedAudioProcessor:
         self.processed_count = 0
         self.failed_count = 0
 
+    def _connect_db(self):
+        """Check a dedicated connection out of the pool (one per ingest worker)"""
+        return self._db_pool.getconn()
+
+    def _release_db(self, db):
+        """Return a worker connection to the pool"""
+        self._db_pool.putconn(db)
+
     def _deduplicate_batch(self, df: pd.DataFrame, unique_columns: list, table_name: str) -> pd.DataFrame:
         """Remove duplicates within the batch, keeping the last occurrence"""
         
@@ -106,7 +251,13 @@ class HPCTimestampedAudioProcessor:
         
         try:
             logger.info("Processing metadata, subtitles, and comments...")
-            self.process_month_metadata()
+            if self.bulk_load:
+                self._prepare_for_bulk_load()
+            try:
+                self.process_month_metadata()
+            finally:
+                if self.bulk_load:
+                    self._finish_bulk_load()
             
             # Update processing stats
             self._update_processing_stats()
@@ -145,124 +296,189 @@ class HPCTimestampedAudioProcessor:
         logger.info(f"Found {len(metadata_files)} metadata, {len(comments_files)} comments, "
                    f"{len(subtitles_files)} subtitles files")
         
-        # Process metadata
+        # The three groups touch disjoint files and tables, so run them
+        # concurrently - each worker streams file by file on its own
+        # connection, keeping peak memory bounded by the largest file
+        groups = []
         if metadata_files:
-            try:
-                # Read all metadata files into single dataframe
-                metadata_dfs = []
-                for f in metadata_files:
-                    try:
-                        df = pd.read_parquet(f)
-                        
-                        # Extract date from filename and add columns
-                        year, month, day = self._extract_date_from_filename(f.name)
-                        df['year'] = year
-                        df['month'] = month
-                        df['date'] = day
-                        
-                        logger.info(f"Processed {f.name}: {len(df)} rows with date {year}-{month:02d}-{day:02d}")
-                        metadata_dfs.append(df)
-                    except Exception as e:
-                        logger.error(f"Failed to read {f.name}: {e}")
-                
-                if metadata_dfs:
-                    combined_metadata = pd.concat(metadata_dfs, ignore_index=True)
-                    logger.info(f"Combined metadata: {len(combined_metadata)} rows")
-
-                    # Debug the problematic values
-                    # self._debug_bigint_ranges(combined_metadata, "metadata")   
-
-                    # Convert boolean columns before storing & sanitize ranges
-                    combined_metadata = self._deduplicate_batch(
-                        combined_metadata,
-                        ['meta_id', 'year', 'month', 'date'],
-                        'metadata'
-                    )
-                    combined_metadata = self._convert_metadata_boolean_columns(combined_metadata)
-                    # combined_metadata = self._sanitize_bigint_values(combined_metadata)
-                    
-                    # Store in database
-                    self._store_metadata_batch(combined_metadata)
-                    
-            except Exception as e:
-                logger.error(f"Failed to process metadata: {e}")
-        
-        # Process comments similarly
+            groups.append(('metadata', self._store_metadata_batch, metadata_files,
+                           self._convert_metadata_boolean_columns, METADATA_COLUMNS))
         if comments_files:
-            try:
-                comments_dfs = []
-                for f in comments_files:
-                    try:
-                        df = pd.read_parquet(f)
-                        
-                        # Extract date from filename and add columns
-                        year, month, day = self._extract_date_from_filename(f.name)
-                        df['year'] = year
-                        df['month'] = month
-                        df['date'] = day
-                        
-                        logger.info(f"Processed {f.name}: {len(df)} rows with date {year}-{month:02d}-{day:02d}")
-                        comments_dfs.append(df)
-                    except Exception as e:
-                        logger.error(f"Failed to read {f.name}: {e}")
-                
-                if comments_dfs:
-                    combined_comments = pd.concat(comments_dfs, ignore_index=True)
-                    logger.info(f"Combined comments: {len(combined_comments)} rows")
-                    
-                    # Deduplicate within batch before other processing
-                    combined_comments = self._deduplicate_batch(
-                        combined_comments, 
-                        ['cid', 'meta_id', 'year', 'month', 'date'], 
-                        'comments'
-                    )
-                    
-                    # Continue with existing processing
-                    combined_comments = self._convert_comment_boolean_columns(combined_comments)
-                    
-                    # Store comments
-                    self._store_comments_batch(combined_comments)
-                    
-            except Exception as e:
-                logger.error(f"Failed to process comments: {e}")
-        
-        # Process subtitles similarly
+            groups.append(('comments', self._store_comments_batch, comments_files,
+                           self._convert_comment_boolean_columns, COMMENTS_COLUMNS))
         if subtitles_files:
-            try:
-                subtitles_dfs = []
-                for f in subtitles_files:
-                    try:
-                        df = pd.read_parquet(f)
-                        
-                        # Extract date from filename and add columns
-                        year, month, day = self._extract_date_from_filename(f.name)
-                        df['year'] = year
-                        df['month'] = month
-                        df['date'] = day
-                        
-                        logger.info(f"Processed {f.name}: {len(df)} rows with date {year}-{month:02d}-{day:02d}")
-                        subtitles_dfs.append(df)
-                    except Exception as e:
-                        logger.error(f"Failed to read {f.name}: {e}")
-                
-                if subtitles_dfs:
-                    combined_subtitles = pd.concat(subtitles_dfs, ignore_index=True)
-                    logger.info(f"Combined subtitles: {len(combined_subtitles)} rows")
-
-                    # Deduplicate within batch before other processing
-                    combined_subtitles = self._deduplicate_batch(
-                        combined_subtitles, ['meta_id', 'year', 'month', 'date'], 'subtitles'
-                    )
-
-                    # Debug and sanitize  
-                    # self._debug_bigint_ranges(combined_subtitles, "subtitles")
-                    # combined_subtitles = self._sanitize_bigint_values(combined_subtitles)
-                    
-                    # Store subtitles
-                    self._store_subtitles_batch(combined_subtitles)
-                    
-            except Exception as e:
-                logger.error(f"Failed to process subtitles: {e}")
+            groups.append(('subtitles', self._store_subtitles_batch, subtitles_files,
+                           None, SUBTITLES_COLUMNS))
+
+        if not groups:
+            return
+
+        with ThreadPoolExecutor(max_workers=len(groups)) as executor:
+            futures = {
+                executor.submit(self._ingest_group, store, files, prepare, columns): name
+                for name, store, files, prepare, columns in groups
+            }
+            for future, name in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Failed to process {name}: {e}")
+
+        del metadata_files, comments_files, subtitles_files, groups
+        gc.collect()
+
+    def _prepare_for_bulk_load(self):
+        """Switch target tables to UNLOGGED and drop secondary indexes
+
+        Index maintenance during bulk ingest is O(log N) per row; rebuilding
+        afterwards is a sequential scan. Constraint-backed (unique) indexes
+        are kept since the upserts rely on them. The dropped definitions
+        are logged and written to a sidecar SQL file before the first DROP
+        runs, so they survive the process dying mid-load instead of living
+        only in this process's memory.
+        """
+        tables = ('audio_metadata', 'comments', 'subtitles')
+        to_drop = []
+
+        with self.db.cursor() as cur:
+            for table in tables:
+                cur.execute("""
+                    SELECT indexname, indexdef
+                    FROM pg_indexes
+                    WHERE tablename = %s
+                      AND indexname NOT IN (
+                          SELECT conname FROM pg_constraint
+                          WHERE conrelid = %s::regclass
+                      )
+                """, (table, table))
+                to_drop.extend(cur.fetchall())
+
+            self._bulk_index_defs = [definition for _, definition in to_drop]
+            self._bulk_index_sql.write_text(
+                ''.join(f"{definition};\n" for definition in self._bulk_index_defs))
+            for definition in self._bulk_index_defs:
+                logger.info(f"Dropping for bulk load: {definition}")
+            logger.info(f"Saved dropped index DDL to {self._bulk_index_sql}")
+
+            for name, _ in to_drop:
+                cur.execute(f"DROP INDEX {name}")
+            for table in tables:
+                cur.execute(f"ALTER TABLE {table} SET UNLOGGED")
+        self.db.commit()
+        logger.info(f"Bulk load prepared: {len(self._bulk_index_defs)} indexes dropped")
+
+    def _finish_bulk_load(self):
+        """Re-create dropped indexes and make the tables LOGGED again"""
+        tables = ('audio_metadata', 'comments', 'subtitles')
+
+        if not self._bulk_index_defs and self._bulk_index_sql.exists():
+            # A previous run died between dropping the indexes and
+            # rebuilding them - recover the DDL it persisted
+            self._bulk_index_defs = [
+                stmt.strip()
+                for stmt in self._bulk_index_sql.read_text().split(';\n')
+                if stmt.strip()
+            ]
+
+        with self.db.cursor() as cur:
+            for table in tables:
+                cur.execute(f"ALTER TABLE {table} SET LOGGED")
+            for definition in self._bulk_index_defs:
+                logger.info(f"Rebuilding index: {definition}")
+                cur.execute(definition)
+        self.db.commit()
+        self._bulk_index_defs = []
+        self._bulk_index_sql.unlink(missing_ok=True)
+        logger.info("Bulk load finished: tables logged, indexes rebuilt")
+
+    def _ingest_group(self, store, files, prepare=None, columns=None):
+        """Ingest one group of parquet files on a dedicated connection"""
+        db = self._connect_db()
+        try:
+            store(lambda: self._iter_group_frames(files, prepare, columns), db=db)
+        finally:
+            self._release_db(db)
+            # Hand the group's arrow buffers and frames back to the OS
+            # before another group peaks - the workers overlap on
+            # memory-constrained nodes
+            gc.collect()
+
+    def _iter_group_frames(self, files, prepare=None, columns=None, prefetch=4):
+        """Yield one prepared DataFrame per parquet file
+
+        Avoids concatenating the whole month into a single frame - each file
+        is read, dated, prepared and released before the next one is loaded.
+        Files are opened through pyarrow.dataset so row groups and columns are
+        decoded on arrow's internal thread pool instead of one at a time.
+        A small prefetch window reads the next files concurrently while the
+        current frame is being upserted, giving backpressure so memory stays
+        bounded at `prefetch` tables.
+        """
+        dataset = ds.dataset([str(Path(f).resolve()) for f in files],
+                             format=PARQUET_FORMAT, filesystem=LOCAL_MMAP_FS)
+        fragments = iter(dataset.get_fragments())
+
+        # Project the read down to the columns we will store; year/month/date
+        # are derived from the filename so they are never read from parquet
+        read_columns = None
+        if columns is not None:
+            wanted = set(columns)
+            read_columns = [c for c in dataset.schema.names if c in wanted]
+
+            # Validate the schema once per group: anything the scraper added
+            # that has no table column is skipped at read time, never decoded
+            # and never serialized over COPY
+            unknown = sorted(set(dataset.schema.names) - wanted)
+            if unknown:
+                logger.warning(f"Ignoring {len(unknown)} parquet columns with no "
+                               f"table mapping: {', '.join(unknown[:10])}"
+                               f"{', ...' if len(unknown) > 10 else ''}")
+            missing = sorted(wanted - set(dataset.schema.names) - {'year', 'month', 'date'})
+            if missing:
+                logger.warning(f"{len(missing)} table columns absent from parquet "
+                               f"schema: {', '.join(missing[:10])}"
+                               f"{', ...' if len(missing) > 10 else ''}")
+
+        def read_fragment(fragment):
+            return fragment.to_table(columns=read_columns, use_threads=True)
+
+        with ThreadPoolExecutor(max_workers=prefetch) as reader:
+            pending = deque()
+            for fragment in fragments:
+                pending.append((fragment, reader.submit(read_fragment, fragment)))
+                if len(pending) >= prefetch:
+                    break
+
+            while pending:
+                fragment, future = pending.popleft()
+
+                # Keep the read pipeline full before blocking on this result
+                next_fragment = next(fragments, None)
+                if next_fragment is not None:
+                    pending.append((next_fragment, reader.submit(read_fragment, next_fragment)))
+
+                fragment_name = Path(fragment.path).name
+                try:
+                    df = _table_to_pandas(future.result())
+                except Exception as e:
+                    logger.error(f"Failed to read {fragment_name}: {e}")
+                    continue
+
+                # Extract date from filename and add columns as narrow ints -
+                # a scalar assignment would allocate three int64 columns
+                year, month, day = self._extract_date_from_filename(fragment_name)
+                df['year'] = np.full(len(df), year, dtype=np.int16)
+                df['month'] = np.full(len(df), month, dtype=np.int8)
+                df['date'] = np.full(len(df), day, dtype=np.int8)
+
+                logger.info(f"Processed {fragment_name}: {len(df)} rows with date {year}-{month:02d}-{day:02d}")
+
+                if prepare is not None:
+                    df = prepare(df)
+
+                yield df
+                del df
+                gc.collect()
     
     def _convert_metadata_boolean_columns(self, metadata_df: pd.DataFrame) -> pd.DataFrame:
         """Convert integer boolean columns to actual booleans in metadata"""
@@ -278,79 +494,185 @@ class HPCTimestampedAudioProcessor:
         
         return metadata_df
 
-    def _store_metadata_batch(self, metadata_df: pd.DataFrame):
-        """Store metadata in database using UPSERT to handle duplicates"""
-        logger.info(f"Storing {len(metadata_df)} metadata records with UPSERT...")
+    def _upsert_frames(self, frames_factory, table: str, columns: list, conflict_columns: list, db=None):
+        """COPY a stream of DataFrames into a staging table, then merge
 
-        # self._debug_bigint_ranges(metadata_df, "metadata")
-        # metadata_df = self._sanitize_bigint_values(metadata_df)
-        
-        # Define the columns we want to insert (in order)
-        columns = [
-            'meta_id', 'year', 'month', 'date', 'poi_id', 'duetinfo_duetfromid',
-            'meta_createtime', 'meta_scheduletime', 'meta_itemcommentstatus', 
-            'meta_diversificationid', 'meta_categorytype', 'meta_textlanguage',
-            'meta_desc', 'meta_locationcreated', 'meta_diversificationlabels',
-            'meta_serverabversions', 'meta_suggestedwords', 'meta_adlabelversion',
-            'meta_bainfo', 'meta_secret', 'meta_privateitem', 'meta_duetenabled',
-            'meta_stitchenabled', 'meta_indexenabled', 'meta_iscontentclassified',
-            'meta_isaigc', 'meta_isad', 'meta_isecvideo', 'meta_aigclabeltype',
-            'meta_aigcdescription', 'author_id', 'author_uniqueid', 'author_nickname',
-            'author_signature', 'author_roomid', 'author_verified', 'author_openfavorite',
-            'author_commentsetting', 'author_duetsetting', 'author_stitchsetting',
-            'author_downloadsetting', 'author_createtime', 'authorstats_followercount',
-            'authorstats_followingcount', 'authorstats_heart', 'authorstats_heartcount',
-            'authorstats_videocount', 'authorstats_diggcount', 'authorstats_friendcount',
-            'music_id', 'music_title', 'music_authorname', 'music_album', 'music_duration',
-            'music_schedulesearchtime', 'music_collected', 'stats_diggcount',
-            'stats_sharecount', 'stats_commentcount', 'stats_playcount', 'stats_collectcount',
-            'video_height', 'video_width', 'video_duration', 'video_bitrate', 'video_ratio',
-            'video_encodedtype', 'video_format', 'video_videoquality', 'video_codectype',
-            'video_definition', 'poi_type', 'poi_name', 'poi_address', 'poi_city',
-            'poi_citycode', 'poi_province', 'poi_country', 'poi_countrycode',
-            'poi_fatherpoiid', 'poi_fatherpoiname', 'poi_category', 'poi_tttypecode',
-            'poi_typecode', 'poi_tttypenametiny', 'poi_tttypenamemedium', 'poi_tttypenamesuper',
-            'adress_addresscountry', 'adress_addresslocality', 'adress_addressregion',
-            'adress_streetaddress', 'statuscode', 'statusmsg', 'description_hash',
-            'subtitle_subtitle_lang', 'bitrate_bitrate_info', 'text_extra_user_mention',
-            'text_extra_hashtag_mention', 'warning_warning', 'timestamp', 'pol', 'hour',
-            'country', 'processed_desc', 'raw', 'collection_timestamp'
-        ]
-        
-        # Prepare data - only include columns that exist in the dataframe
-        available_columns = [col for col in columns if col in metadata_df.columns]
-        data_tuples = [tuple(row[col] if col in row else None for col in available_columns) 
-                      for _, row in metadata_df.iterrows()]
-        
-        # Build the UPSERT query
-        placeholders = ', '.join(['%s'] * len(available_columns))
-        columns_str = ', '.join(available_columns)
-        
-        # Create UPDATE SET clause (exclude the unique constraint columns from updates)
-        update_columns = [col for col in available_columns if col not in ['meta_id', 'year', 'month', 'date']]
+        Takes a zero-argument callable producing the frame iterator - the
+        scan is cheap to re-open, so the CSV fallback below restarts it
+        rather than buffering the whole group in memory against a failure
+        that usually never happens; peak memory stays at the prefetch
+        window on both paths. Frames are deduplicated, CSV-encoded in a
+        process pool (the encoding is CPU-bound, not I/O-bound) and
+        streamed into an unlogged stage with COPY while the next chunks
+        are being encoded. The upsert semantics are kept by merging the
+        stage with ON CONFLICT, same as the ADBC path. One transaction
+        per group; the queue entry is retried on failure.
+        """
+        db = db if db is not None else self.db
+
+        if adbc_dbapi is not None:
+            try:
+                self._upsert_frames_adbc(frames_factory(), table, columns, conflict_columns, db)
+                return
+            except Exception as e:
+                logger.warning(f"ADBC upsert failed for {table}, "
+                               f"re-opening the scan for CSV COPY: {e}")
+
+        stage = f"{table}_stage"
+        seen_columns = []
+        total = 0
+
+        try:
+            with db.cursor() as cur:
+                cur.execute(f"CREATE UNLOGGED TABLE IF NOT EXISTS {stage} (LIKE {table} INCLUDING DEFAULTS)")
+                cur.execute(f"TRUNCATE {stage}")
+            db.commit()
+
+            with ProcessPoolExecutor(max_workers=4) as encoder, db.cursor() as cur:
+                # Skip the per-commit WAL flush for the bulk window
+                cur.execute("SET LOCAL synchronous_commit = OFF")
+
+                for df in frames_factory():
+                    df = self._deduplicate_batch(df, conflict_columns, table)
+
+                    # Only include columns that exist in the dataframe
+                    available_columns = [col for col in columns if col in df.columns]
+                    for col in available_columns:
+                        if col not in seen_columns:
+                            seen_columns.append(col)
+                    columns_str = ', '.join(available_columns)
+
+                    chunks = [(df.iloc[i:i + 50000], available_columns)
+                              for i in range(0, len(df), 50000)]
+                    for csv_bytes in encoder.map(_frame_chunk_to_copy_csv, chunks):
+                        cur.copy_expert(
+                            f"COPY {stage} ({columns_str}) FROM STDIN WITH (FORMAT CSV, NULL '')",
+                            io.BytesIO(csv_bytes)
+                        )
+                    total += len(df)
+
+                merge_columns = [col for col in columns if col in seen_columns]
+                self._merge_stage(cur, table, stage, merge_columns, conflict_columns)
+
+            db.commit()
+            logger.info(f"Successfully upserted {total} {table} records")
+        except Exception as e:
+            logger.error(f"Failed to upsert {table}: {e}")
+            db.rollback()
+            raise
+
+    def _merge_stage(self, cur, table: str, stage: str, merge_columns: list, conflict_columns: list):
+        """Merge a staging table into the target, last-loaded row wins"""
+        conflict_str = ', '.join(conflict_columns)
+        columns_str = ', '.join(merge_columns)
+        update_columns = [col for col in merge_columns if col not in conflict_columns]
         update_set = ', '.join([f"{col} = EXCLUDED.{col}" for col in update_columns])
-        
-        upsert_query = f"""
-            INSERT INTO audio_metadata ({columns_str})
-            VALUES %s
-            ON CONFLICT (meta_id, year, month, date) 
-            DO UPDATE SET 
+
+        cur.execute(f"""
+            INSERT INTO {table} ({columns_str})
+            SELECT DISTINCT ON ({conflict_str}) {columns_str}
+            FROM {stage}
+            ORDER BY {conflict_str}, ctid DESC
+            ON CONFLICT ({conflict_str})
+            DO UPDATE SET
                 {update_set},
                 updated_at = NOW()
+        """)
+        cur.execute(f"DROP TABLE {stage}")
+
+    @staticmethod
+    def _cast_for_stage(arrow_table, numeric_columns):
+        """Cast integer Arrow columns headed for NUMERIC stage columns"""
+        fields = [
+            pa.field(f.name, pa.decimal128(38, 0))
+            if f.name in numeric_columns and pa.types.is_integer(f.type) else f
+            for f in arrow_table.schema
+        ]
+        schema = pa.schema(fields)
+        if schema == arrow_table.schema:
+            return arrow_table
+        return arrow_table.cast(schema)
+
+    def _upsert_frames_adbc(self, frames, table: str, columns: list, conflict_columns: list, db=None):
+        """Ingest frames via ADBC binary COPY into a staging table, then merge
+
+        Arrow tables go straight into Postgres with COPY BINARY - no pandas
+        row iteration and no text encoding. The upsert semantics are kept by
+        loading into an unlogged stage and merging with ON CONFLICT.
         """
-        
+        db = db if db is not None else self.db
+        stage = f"{table}_stage"
+        seen_columns = []
+        total = 0
+
         try:
-            with self.db.cursor() as cur:
-                execute_values(
-                    cur, upsert_query, data_tuples,
-                    template=None, page_size=1000
-                )
-                self.db.commit()
-            logger.info(f"Successfully upserted {len(metadata_df)} metadata records")
+            with db.cursor() as cur:
+                cur.execute(f"CREATE UNLOGGED TABLE IF NOT EXISTS {stage} (LIKE {table} INCLUDING DEFAULTS)")
+                cur.execute(f"TRUNCATE {stage}")
+                # Binary COPY needs exact type agreement with the stage,
+                # which inherits NUMERIC columns from the target - integer
+                # Arrow columns (downcast date parts, int64 counts) have to
+                # be cast to decimal before ingest or append fails outright
+                cur.execute("""
+                    SELECT column_name FROM information_schema.columns
+                    WHERE table_name = %s AND data_type = 'numeric'
+                """, (stage,))
+                numeric_columns = {row[0] for row in cur.fetchall()}
+            db.commit()
+
+            with adbc_dbapi.connect(self.db_url) as conn:
+                # Coalesce small per-file tables into larger COPY batches.
+                # pa.concat_tables only stitches chunk lists together - no
+                # rows are copied - so this costs nothing over per-file COPYs
+                buffered = []
+                buffered_rows = 0
+
+                def flush():
+                    nonlocal buffered, buffered_rows
+                    if not buffered:
+                        return
+                    combined = pa.concat_tables(buffered, promote_options='permissive')
+                    with conn.cursor() as acur:
+                        acur.adbc_ingest(stage, combined, mode='append')
+                    conn.commit()
+                    buffered = []
+                    buffered_rows = 0
+
+                for df in frames:
+                    df = self._deduplicate_batch(df, conflict_columns, table)
+
+                    available_columns = [col for col in columns if col in df.columns]
+                    for col in available_columns:
+                        if col not in seen_columns:
+                            seen_columns.append(col)
+
+                    buffered.append(self._cast_for_stage(
+                        pa.Table.from_pandas(df[available_columns], preserve_index=False),
+                        numeric_columns))
+                    buffered_rows += len(df)
+                    total += len(df)
+                    if buffered_rows >= 200000:
+                        flush()
+                flush()
+
+            # Merge stage into the target, last file wins for duplicate keys
+            merge_columns = [col for col in columns if col in seen_columns]
+            with db.cursor() as cur:
+                cur.execute("SET LOCAL synchronous_commit = OFF")
+                self._merge_stage(cur, table, stage, merge_columns, conflict_columns)
+            db.commit()
+            logger.info(f"Successfully upserted {total} {table} records via ADBC")
         except Exception as e:
-            logger.error(f"Failed to upsert metadata: {e}")
-            self.db.rollback()
+            logger.error(f"Failed to upsert {table} via ADBC: {e}")
+            db.rollback()
             raise
+
+    def _store_metadata_batch(self, metadata_frames, db=None):
+        """Store metadata frames in database using UPSERT to handle duplicates"""
+        logger.info("Storing metadata records with UPSERT...")
+
+        self._upsert_frames(metadata_frames, 'audio_metadata', METADATA_COLUMNS,
+                            ['meta_id', 'year', 'month', 'date'], db=db)
     
     def _convert_comment_boolean_columns(self, comments_df: pd.DataFrame) -> pd.DataFrame:
         """Convert integer boolean columns to actual booleans"""
@@ -367,109 +689,19 @@ class HPCTimestampedAudioProcessor:
         
         return comments_df
 
-    def _store_comments_batch(self, comments_df: pd.DataFrame):
-        """Store comments in database using UPSERT to handle duplicates"""
-        logger.info(f"Storing {len(comments_df)} comment records with UPSERT...")
-        
-        # Define the columns we want to insert (in order)
-        columns = [
-            'meta_id', 'year', 'month', 'date', 'cid', 'aweme_id', 'comment_text',
-            'create_time', 'digg_count', 'reply_comment_total', 'comment_language',
-            'status', 'stick_position', 'is_comment_translatable', 'no_show',
-            'user_digged', 'user_buried', 'is_author_digged', 'author_pin',
-            'reply_id', 'reply_to_reply_id', 'reply_comment', 'reply_score',
-            'show_more_score', 'uid', 'sec_uid', 'nickname', 'unique_id',
-            'custom_verify', 'enterprise_verify_reason', 'account_labels',
-            'label_list', 'sort_tags', 'comment_post_item_ids', 'collect_stat',
-            'ad_cover_url', 'advance_feature_item_order', 'advanced_feature_info',
-            'bold_fields', 'can_message_follow_status_list', 'can_set_geofencing',
-            'cha_list', 'cover_url', 'events', 'followers_detail', 'geofencing',
-            'homepage_bottom_toast', 'item_list', 'mutual_relation_avatars',
-            'need_points', 'platform_sync_info', 'relative_users', 'search_highlight',
-            'shield_edit_field_info', 'type_label', 'user_profile_guide',
-            'user_tags', 'white_cover_url', 'total', 'collection_timestamp',
-            'hash_unique_id'
-        ]
-        
-        # Prepare data - only include columns that exist in the dataframe
-        available_columns = [col for col in columns if col in comments_df.columns]
-        data_tuples = [tuple(row[col] if col in row else None for col in available_columns) 
-                      for _, row in comments_df.iterrows()]
-        
-        # Build the UPSERT query
-        placeholders = ', '.join(['%s'] * len(available_columns))
-        columns_str = ', '.join(available_columns)
-        
-        # Create UPDATE SET clause (exclude the unique constraint columns from updates)
-        update_columns = [col for col in available_columns if col not in ['cid', 'meta_id', 'year', 'month', 'date']]
-        update_set = ', '.join([f"{col} = EXCLUDED.{col}" for col in update_columns])
-        
-        upsert_query = f"""
-            INSERT INTO comments ({columns_str})
-            VALUES %s
-            ON CONFLICT (cid, meta_id, year, month, date) 
-            DO UPDATE SET 
-                {update_set},
-                updated_at = NOW()
-        """
-        
-        try:
-            with self.db.cursor() as cur:
-                execute_values(
-                    cur, upsert_query, data_tuples,
-                    template=None, page_size=1000
-                )
-                self.db.commit()
-            logger.info(f"Successfully upserted {len(comments_df)} comment records")
-        except Exception as e:
-            logger.error(f"Failed to upsert comments: {e}")
-            self.db.rollback()
-            raise
-    
-    def _store_subtitles_batch(self, subtitles_df: pd.DataFrame):
-        """Store subtitles in database using UPSERT to handle duplicates"""
-        logger.info(f"Storing {len(subtitles_df)} subtitle records with UPSERT...")
-        
-        # Define the columns we want to insert (in order)
-        columns = [
-            'meta_id', 'year', 'month', 'date', 'content', 'lang', 'type', 'rest',
-            'collection_timestamp', 'hash_unique_id'
-        ]
-        
-        # Prepare data - only include columns that exist in the dataframe
-        available_columns = [col for col in columns if col in subtitles_df.columns]
-        data_tuples = [tuple(row[col] if col in row else None for col in available_columns) 
-                      for _, row in subtitles_df.iterrows()]
-        
-        # Build the UPSERT query
-        placeholders = ', '.join(['%s'] * len(available_columns))
-        columns_str = ', '.join(available_columns)
-        
-        # Create UPDATE SET clause (exclude the unique constraint columns from updates)
-        update_columns = [col for col in available_columns if col not in ['meta_id', 'year', 'month', 'date']]
-        update_set = ', '.join([f"{col} = EXCLUDED.{col}" for col in update_columns])
-        
-        upsert_query = f"""
-            INSERT INTO subtitles ({columns_str})
-            VALUES %s
-            ON CONFLICT (meta_id, year, month, date) 
-            DO UPDATE SET 
-                {update_set},
-                updated_at = NOW()
-        """
-        
-        try:
-            with self.db.cursor() as cur:
-                execute_values(
-                    cur, upsert_query, data_tuples,
-                    template=None, page_size=1000
-                )
-                self.db.commit()
-            logger.info(f"Successfully upserted {len(subtitles_df)} subtitle records")
-        except Exception as e:
-            logger.error(f"Failed to upsert subtitles: {e}")
-            self.db.rollback()
-            raise
+    def _store_comments_batch(self, comments_frames, db=None):
+        """Store comment frames in database using UPSERT to handle duplicates"""
+        logger.info("Storing comment records with UPSERT...")
+
+        self._upsert_frames(comments_frames, 'comments', COMMENTS_COLUMNS,
+                            ['cid', 'meta_id', 'year', 'month', 'date'], db=db)
+
+    def _store_subtitles_batch(self, subtitles_frames, db=None):
+        """Store subtitle frames in database using UPSERT to handle duplicates"""
+        logger.info("Storing subtitle records with UPSERT...")
+
+        self._upsert_frames(subtitles_frames, 'subtitles', SUBTITLES_COLUMNS,
+                            ['meta_id', 'year', 'month', 'date'], db=db)
     
     
     def _update_processing_stats(self):
@@ -512,6 +744,12 @@ def main():
     parser.add_argument('--rsync-user', default='audio_user', help='Username for rsync transfers')
     parser.add_argument('--storage-root', default='/opt/audio_storage', help='Root directory on target server')
     parser.add_argument('--use-dummy-storage', action='store_true', help='Use dummy storage (no actual transfers)')
+    parser.add_argument('--bulk-load', action='store_true',
+                        help='Drop secondary indexes and mark tables UNLOGGED during the '
+                             'load. WARNING: a server crash truncates UNLOGGED tables '
+                             'entirely - previously loaded months included, not just the '
+                             'in-flight load. Dropped index DDL is saved to '
+                             'bulk_load_index_defs.sql in the staging directory')
     parser.add_argument('--ssh_keyfile', default='ent.pem', help='SSH identity file for cloud storage')
     
     args = parser.parse_args()
@@ -1,19 +1,66 @@
 #!/usr/bin/env python3
 # parallel_coordinator.py - Utilities for coordinating parallel processing jobs
 import argparse
+import io
+import os
+# Staying on psycopg2: the pipeline_utils container pins it, and the two
+# wins psycopg3 would bring are already covered - the stats queries were
+# fused into a single round-trip and ingest goes through COPY/ADBC rather
+# than executemany. Revisit if the containers move to psycopg 3.
 import psycopg2
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs
 from pathlib import Path
 import logging
 from typing import List, Dict, Optional
 import sys
 
+# Optional ADBC driver: binary COPY straight from Arrow skips the CSV
+# text round-trip for the numeric stats columns; fall back to text COPY
+# when the driver is not installed
+try:
+    from adbc_driver_postgresql import dbapi as adbc_dbapi
+except ImportError:
+    adbc_dbapi = None
+
+# Coalesce column-chunk reads so each parquet file is fetched with a few
+# large IOs instead of one small read per column chunk
+PARQUET_FORMAT = ds.ParquetFileFormat(
+    default_fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=True)
+)
+
+# Memory-map local parquet reads so arrow decodes straight out of the
+# page cache instead of first copying each file into a userspace buffer
+LOCAL_MMAP_FS = pyarrow.fs.LocalFileSystem(use_mmap=True)
+
+# The only metadata columns we store - pushed down into the parquet reader
+# so the remaining 80+ columns are never read or decompressed
+METADATA_COLS = ['meta_id', 'author_id', 'author_nickname', 'stats_playcount',
+                 'stats_sharecount', 'stats_commentcount', 'stats_diggcount']
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class ParallelCoordinator:
     def __init__(self, db_string: str):
-        self.db = psycopg2.connect(db_string)
+        self.db_string = db_string
+        # One persistent connection for the coordinator lifetime, with TCP
+        # keepalives so it survives long per-day batches instead of being
+        # silently dropped and renegotiated mid-run
+        self.db = psycopg2.connect(db_string,
+                                   keepalives=1,
+                                   keepalives_idle=60,
+                                   keepalives_interval=10,
+                                   keepalives_count=3)
+        
+        # Connection URI for the optional ADBC ingest path, built from the
+        # DSN verbatim so the password survives (get_dsn_parameters drops it)
+        params = psycopg2.extensions.parse_dsn(db_string)
+        self.db_uri = (f"postgresql://{params.get('user', '')}:{params.get('password', '')}@"
+                       f"{params.get('host', 'localhost')}:{params.get('port', 5432)}/"
+                       f"{params.get('dbname', '')}")
     
     def process_metadata_for_day(self, date_str: str, staging_dir: Path):
         """Process all metadata and comments files for a day after parallel processing"""
@@ -21,10 +68,24 @@ class ParallelCoordinator:
         
         year, month, day = map(int, date_str.split('-'))
         
-        # Collect all parquet files
-        metadata_files = sorted(staging_dir.glob(f"0_{date_str}_*_metadata.parquet"))
-        comments_files = sorted(staging_dir.glob(f"0_{date_str}_*_comments.parquet"))
-        subtitles_files = sorted(staging_dir.glob(f"0_{date_str}_*_subtitles.parquet"))
+        # Collect all parquet files in one directory sweep - three glob
+        # calls would each rescan and fnmatch the whole staging directory
+        metadata_files, comments_files, subtitles_files = [], [], []
+        prefix = f"0_{date_str}_"
+        with os.scandir(staging_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if not name.startswith(prefix):
+                    continue
+                if name.endswith("_metadata.parquet"):
+                    metadata_files.append(Path(entry.path))
+                elif name.endswith("_comments.parquet"):
+                    comments_files.append(Path(entry.path))
+                elif name.endswith("_subtitles.parquet"):
+                    subtitles_files.append(Path(entry.path))
+        metadata_files.sort()
+        comments_files.sort()
+        subtitles_files.sort()
         
         logger.info(f"Found {len(metadata_files)} metadata, {len(comments_files)} comments, "
                    f"{len(subtitles_files)} subtitles files")
@@ -50,48 +111,58 @@ class ParallelCoordinator:
             except Exception as e:
                 logger.error(f"Failed to process subtitles files: {e}")
     
+    def _read_parquet_batch(self, files: List[Path]) -> Optional[pd.DataFrame]:
+        """Read a list of parquet files as one parallel dataset scan
+        
+        pyarrow.dataset reads row groups across all files on its internal
+        thread pool and materializes a single table - no per-file loop and
+        no second concat allocation. self_destruct hands the arrow buffers
+        to pandas instead of keeping both copies alive.
+        """
+        try:
+            table = ds.dataset([str(Path(f).resolve()) for f in files], format=PARQUET_FORMAT,
+                               filesystem=LOCAL_MMAP_FS).to_table(use_threads=True)
+        except Exception as e:
+            logger.error(f"Failed to read parquet batch: {e}")
+            return None
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+    
+    def _iter_parquet_frames(self, files: List[Path], columns: Optional[List[str]] = None,
+                             batch_size: int = 65536):
+        """Yield record-batch-sized DataFrames from one dataset scan
+        
+        Used by the metadata path so no day-wide combined frame is ever
+        materialized - each batch is stored while the scanner decodes the
+        next one, keeping peak memory at one batch instead of the whole day.
+        Passing `columns` projects the read down at the parquet layer, so
+        unused columns are never decompressed.
+        """
+        dataset = ds.dataset([str(Path(f).resolve()) for f in files], format=PARQUET_FORMAT,
+                             filesystem=LOCAL_MMAP_FS)
+        if columns is not None:
+            columns = [c for c in columns if c in dataset.schema.names]
+        for batch in dataset.to_batches(columns=columns, batch_size=batch_size, use_threads=True):
+            if batch.num_rows == 0:
+                continue
+            yield pa.Table.from_batches([batch]).to_pandas(split_blocks=True, self_destruct=True)
+    
     def _process_metadata_files(self, metadata_files: List[Path], year: int, month: int, day: int):
         """Process metadata parquet files"""
         logger.info(f"Processing {len(metadata_files)} metadata files")
         
-        # Read all metadata files into single dataframe
-        metadata_dfs = []
-        for f in metadata_files:
-            try:
-                df = pd.read_parquet(f)
-                metadata_dfs.append(df)
-                logger.debug(f"Read {len(df)} records from {f.name}")
-            except Exception as e:
-                logger.error(f"Failed to read {f.name}: {e}")
-        
-        if not metadata_dfs:
-            logger.warning("No metadata files could be read")
-            return
-        
-        combined_metadata = pd.concat(metadata_dfs, ignore_index=True)
-        logger.info(f"Combined metadata: {len(combined_metadata)} rows")
-        
-        # Store in database
-        self._store_metadata_batch(combined_metadata, year, month, day)
+        # Stream batches straight into storage - no combined dataframe
+        self._store_metadata_batch(
+            lambda: self._iter_parquet_frames(metadata_files, columns=METADATA_COLS),
+            year, month, day)
     
     def _process_comments_files(self, comments_files: List[Path], year: int, month: int, day: int):
         """Process comments parquet files"""
         logger.info(f"Processing {len(comments_files)} comments files")
         
-        comments_dfs = []
-        for f in comments_files:
-            try:
-                df = pd.read_parquet(f)
-                comments_dfs.append(df)
-                logger.debug(f"Read {len(df)} records from {f.name}")
-            except Exception as e:
-                logger.error(f"Failed to read {f.name}: {e}")
-        
-        if not comments_dfs:
+        combined_comments = self._read_parquet_batch(comments_files)
+        if combined_comments is None:
             logger.warning("No comments files could be read")
             return
-        
-        combined_comments = pd.concat(comments_dfs, ignore_index=True)
         logger.info(f"Combined comments: {len(combined_comments)} rows")
         
         # Store comments in database (implement when comments table is ready)
@@ -102,75 +173,152 @@ class ParallelCoordinator:
         """Process subtitles parquet files"""
         logger.info(f"Processing {len(subtitles_files)} subtitles files")
         
-        subtitles_dfs = []
-        for f in subtitles_files:
-            try:
-                df = pd.read_parquet(f)
-                subtitles_dfs.append(df)
-                logger.debug(f"Read {len(df)} records from {f.name}")
-            except Exception as e:
-                logger.error(f"Failed to read {f.name}: {e}")
-        
-        if not subtitles_dfs:
+        combined_subtitles = self._read_parquet_batch(subtitles_files)
+        if combined_subtitles is None:
             logger.warning("No subtitles files could be read")
             return
-        
-        combined_subtitles = pd.concat(subtitles_dfs, ignore_index=True)
         logger.info(f"Combined subtitles: {len(combined_subtitles)} rows")
         
         # Store subtitles in database (implement when subtitles table is ready)
         # self._store_subtitles_batch(combined_subtitles, year, month, day)
         logger.info("Subtitles processing completed (storage not implemented yet)")
     
-    def _store_metadata_batch(self, metadata_df: pd.DataFrame, year: int, month: int, day: int):
-        """Store metadata in database using pandas to_sql"""
-        # Map DataFrame columns to database columns
-        column_mapping = {
-            'meta_id': 'meta_id',
-            'author_id': 'author_id',
-            'author_nickname': 'author_nickname',
-            'stats_playcount': 'stats_playcount',
-            'stats_sharecount': 'stats_sharecount',
-            'stats_commentcount': 'stats_commentcount',
-            'stats_diggcount': 'stats_diggcount',
-        }
-        
-        # Rename columns that exist in the dataframe
-        available_columns = {k: v for k, v in column_mapping.items() if k in metadata_df.columns}
-        if available_columns:
-            metadata_df = metadata_df.rename(columns=available_columns)
+    def _prepare_metadata_frame(self, metadata_df: pd.DataFrame, year: int, month: int, day: int):
+        """Date-stamp and project one metadata frame for storage
         
+        Parquet column names already match the database, and the projection
+        happened at read time, so there is no rename step.
+        """
         # Add date columns
         metadata_df['year'] = year
         metadata_df['month'] = month
         metadata_df['date'] = day
         
-        # Store in database
-        try:
-            # Convert psycopg2 connection to SQLAlchemy-compatible connection string
-            from sqlalchemy import create_engine
-            
-            # Create engine from psycopg2 connection info
-            conn_info = self.db.get_dsn_parameters()
-            engine = create_engine(
-                f"postgresql://{conn_info['user']}:{conn_info.get('password', '')}@"
-                f"{conn_info['host']}:{conn_info['port']}/{conn_info['dbname']}"
-            )
-            
-            metadata_df.to_sql(
-                'audio_metadata',
-                engine,
-                if_exists='append',
-                index=False,
-                method='multi',
-                chunksize=1000
-            )
-            logger.info(f"Stored {len(metadata_df)} metadata records")
-            
-        except Exception as e:
-            logger.error(f"Failed to store metadata: {e}")
-            # Fallback to manual insertion if needed
-            self._store_metadata_manual(metadata_df, year, month, day)
+        # Downcast the count columns - parquet hands them over as int64 but
+        # they fit comfortably in 32 bits, which halves their bytes on the
+        # wire for the binary COPY path
+        for col in ('stats_playcount', 'stats_sharecount',
+                    'stats_commentcount', 'stats_diggcount'):
+            if col in metadata_df.columns:
+                metadata_df[col] = pd.to_numeric(metadata_df[col], downcast='unsigned')
+        
+        # Keep only the known columns plus the date columns for COPY
+        keep = [c for c in METADATA_COLS if c in metadata_df.columns]
+        keep += ['year', 'month', 'date']
+        return metadata_df[keep], keep
+    
+    def _store_metadata_batch(self, frames_factory, year: int, month: int, day: int):
+        """Store a stream of metadata frames with COPY FROM STDIN
+        
+        Takes a zero-argument callable producing the frame iterator:
+        frames are stored as they arrive from the scanner, and the text
+        fallback re-opens the scan instead of buffering the day, so it
+        never exists as one combined dataframe on this side either.
+        """
+        total = 0
+        stage_ready = False
+        adbc_done = False
+        
+        # Binary COPY via ADBC when available - numeric columns go over the
+        # wire in binary instead of float/int -> text -> float/int. The
+        # ingest targets the same staging table as the text path, so the
+        # final ON CONFLICT merge applies either way and date re-runs do
+        # not trip the unique constraint
+        if adbc_dbapi is not None:
+            try:
+                with self.db.cursor() as cur:
+                    cur.execute("CREATE UNLOGGED TABLE IF NOT EXISTS audio_metadata_stage "
+                                "(LIKE audio_metadata INCLUDING DEFAULTS)")
+                    cur.execute("TRUNCATE audio_metadata_stage")
+                    # Binary COPY needs exact type agreement with the
+                    # NUMERIC stage columns - the downcast counts and date
+                    # parts have to go over as decimal, not int
+                    cur.execute("""
+                        SELECT column_name FROM information_schema.columns
+                        WHERE table_name = 'audio_metadata_stage'
+                          AND data_type = 'numeric'
+                    """)
+                    numeric_cols = {row[0] for row in cur.fetchall()}
+                self.db.commit()
+                
+                with adbc_dbapi.connect(self.db_uri) as conn:
+                    for df in frames_factory():
+                        df, _ = self._prepare_metadata_frame(df, year, month, day)
+                        arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+                        fields = [
+                            pa.field(f.name, pa.decimal128(38, 0))
+                            if f.name in numeric_cols and pa.types.is_integer(f.type) else f
+                            for f in arrow_table.schema
+                        ]
+                        schema = pa.schema(fields)
+                        if schema != arrow_table.schema:
+                            arrow_table = arrow_table.cast(schema)
+                        with conn.cursor() as cur:
+                            cur.adbc_ingest('audio_metadata_stage', arrow_table, mode='append')
+                        conn.commit()
+                        total += len(df)
+                stage_ready = True
+                adbc_done = True
+                logger.info(f"Staged {total} metadata records via ADBC")
+            except Exception as e:
+                logger.error(f"ADBC ingest failed, falling back to text COPY: {e}")
+                self.db.rollback()
+                total = 0
+                stage_ready = False
+        
+        # Stream through COPY into an UNLOGGED staging table - the hot COPY
+        # loop writes no WAL, and the final INSERT ... SELECT moves the day
+        # into audio_metadata in one logged statement off the hot path
+        frames = [] if adbc_done else frames_factory()
+        for df in frames:
+            df, keep = self._prepare_metadata_frame(df, year, month, day)
+            try:
+                if not stage_ready:
+                    with self.db.cursor() as cur:
+                        cur.execute("CREATE UNLOGGED TABLE IF NOT EXISTS audio_metadata_stage "
+                                    "(LIKE audio_metadata INCLUDING DEFAULTS)")
+                        cur.execute("TRUNCATE audio_metadata_stage")
+                    stage_ready = True
+                
+                columns_str = ', '.join(keep)
+                buf = io.StringIO()
+                df.to_csv(buf, index=False, header=False, na_rep='\\N')
+                buf.seek(0)
+                
+                with self.db.cursor() as cur:
+                    # The stage is disposable - skip the WAL flush on commit
+                    cur.execute("SET LOCAL synchronous_commit = OFF")
+                    cur.copy_expert(
+                        f"COPY audio_metadata_stage ({columns_str}) FROM STDIN WITH (FORMAT CSV, NULL '\\N')",
+                        buf
+                    )
+                self.db.commit()
+                total += len(df)
+                
+            except psycopg2.Error as e:
+                logger.error(f"Failed to store metadata batch: {e}")
+                self.db.rollback()
+                # Fallback to manual insertion if needed
+                self._store_metadata_manual(df, year, month, day)
+        
+        if stage_ready:
+            try:
+                with self.db.cursor() as cur:
+                    # The merge is where index maintenance happens - give it
+                    # memory for the B-tree updates and defer the WAL flush;
+                    # the queue entry is simply retried if this transaction
+                    # is lost
+                    cur.execute("SET LOCAL maintenance_work_mem = '1GB'")
+                    cur.execute("SET LOCAL synchronous_commit = OFF")
+                    cur.execute("INSERT INTO audio_metadata SELECT * FROM audio_metadata_stage "
+                                "ON CONFLICT DO NOTHING")
+                    cur.execute("DROP TABLE audio_metadata_stage")
+                self.db.commit()
+            except psycopg2.Error as e:
+                logger.error(f"Failed to merge metadata stage: {e}")
+                self.db.rollback()
+        
+        logger.info(f"Stored {total} metadata records")
     
     def _store_metadata_manual(self, metadata_df: pd.DataFrame, year: int, month: int, day: int):
         """Manual metadata insertion as fallback"""
@@ -178,12 +326,14 @@ class ParallelCoordinator:
         
         try:
             with self.db.cursor() as cur:
-                for _, row in metadata_df.iterrows():
-                    # Basic insertion with available columns
-                    cur.execute("""
-                        INSERT INTO audio_metadata (year, month, date, created_at)
-                        VALUES (%s, %s, %s, NOW())
-                    """, (year, month, day))
+                # The fallback rows are identical, so a single INSERT over
+                # generate_series replaces the per-row execute loop - no
+                # Python-side iteration at all
+                cur.execute("""
+                    INSERT INTO audio_metadata (year, month, date, created_at)
+                    SELECT %s, %s, %s, NOW()
+                    FROM generate_series(1, %s)
+                """, (year, month, day, len(metadata_df)))
                 
                 self.db.commit()
                 logger.info(f"Manually stored {len(metadata_df)} metadata records")
@@ -196,46 +346,34 @@ class ParallelCoordinator:
         year, month, day = map(int, date_str.split('-'))
         
         with self.db.cursor() as cur:
-            # Get basic counts
-            cur.execute("""
-                SELECT COUNT(*) as audio_count
-                FROM audio_files 
-                WHERE year = %s AND month = %s AND date = %s
-            """, (year, month, day))
-            audio_count = cur.fetchone()[0]
-            
-            cur.execute("""
-                SELECT COUNT(*) as transcript_count
-                FROM transcripts t
-                JOIN audio_files a ON t.audio_file_id = a.id
-                WHERE a.year = %s AND a.month = %s AND a.date = %s
-            """, (year, month, day))
-            transcript_count = cur.fetchone()[0]
-            
-            cur.execute("""
-                SELECT COUNT(*) as metadata_count
-                FROM audio_metadata
-                WHERE year = %s AND month = %s AND date = %s
-            """, (year, month, day))
-            metadata_count = cur.fetchone()[0]
-            
-            # Get processing queue status
+            # The counts and queue status are independent, so fuse them into
+            # one statement - one network round-trip instead of four
             cur.execute("""
-                SELECT status, processing_start, processing_end, error_message
-                FROM processing_queue
-                WHERE year = %s AND month = %s AND date = %s
+                WITH params AS (SELECT %s::int AS y, %s::int AS m, %s::int AS d)
+                SELECT
+                    (SELECT COUNT(*) FROM audio_files, params
+                     WHERE year = y AND month = m AND date = d) AS audio_count,
+                    (SELECT COUNT(*) FROM transcripts t
+                     JOIN audio_files a ON t.audio_file_id = a.id, params
+                     WHERE a.year = y AND a.month = m AND a.date = d) AS transcript_count,
+                    (SELECT COUNT(*) FROM audio_metadata, params
+                     WHERE year = y AND month = m AND date = d) AS metadata_count,
+                    q.status, q.processing_start, q.processing_end, q.error_message
+                FROM params
+                LEFT JOIN processing_queue q
+                    ON q.year = params.y AND q.month = params.m AND q.date = params.d
             """, (year, month, day))
-            queue_result = cur.fetchone()
+            row = cur.fetchone()
             
             return {
                 'date': date_str,
-                'audio_files': audio_count,
-                'transcripts': transcript_count,
-                'metadata_records': metadata_count,
-                'queue_status': queue_result[0] if queue_result else 'not_found',
-                'processing_start': queue_result[1] if queue_result else None,
-                'processing_end': queue_result[2] if queue_result else None,
-                'error_message': queue_result[3] if queue_result else None
+                'audio_files': row[0],
+                'transcripts': row[1],
+                'metadata_records': row[2],
+                'queue_status': row[3] if row[3] is not None else 'not_found',
+                'processing_start': row[4],
+                'processing_end': row[5],
+                'error_message': row[6]
             }
 
 
@@ -5,11 +5,14 @@ Replaces cloud storage with rsync-based file transfer to database host
 """
 
 import os
+import re
 import subprocess
+import tempfile
+import threading
 import logging
 from pathlib import Path
-from typing import List, Optional, Tuple
-from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
 logger = logging.getLogger(__name__)
@@ -37,6 +40,17 @@ class RsyncStorageManager:
         self.ssh_key_path = ssh_key_path
         self.max_retries = max_retries
         
+        # Multiplex all ssh/rsync sessions over one master connection -
+        # each fresh SSH handshake (KEX, auth, cipher setup) costs hundreds
+        # of milliseconds, which dominates small-file uploads
+        self._control_path = f"/tmp/ssh-mux-{rsync_user}-{os.getpid()}"
+        
+        # Remote directories already created this run - uploading a day of
+        # files into the same few directories should cost a handful of
+        # mkdirs, not one SSH round-trip per file
+        self._dir_cache = set()
+        self._dir_lock = threading.Lock()
+        
         # Build SSH command with options
         ssh_options = []
         if self.ssh_key_path:
@@ -44,23 +58,58 @@ class RsyncStorageManager:
         ssh_options.extend([
             '-o', 'StrictHostKeyChecking=no',
             '-o', 'UserKnownHostsFile=/dev/null',
-            '-o', 'BatchMode=yes'  # Fail immediately if auth fails
+            '-o', 'BatchMode=yes',  # Fail immediately if auth fails
+            '-o', 'ControlMaster=auto',
+            '-o', f'ControlPath={self._control_path}',
+            '-o', 'ControlPersist=600'
         ])
+        self._ssh_options = ssh_options
         self.ssh_cmd = 'ssh ' + ' '.join(ssh_options)
         
         # Rsync options for optimized transfer
-        self.rsync_options = [
+        # No --compress: the payload is opus/mp3, already compressed -
+        # zlib on top burns a core on both ends for ~0% size reduction
+        # and caps throughput at single-core zlib speed
+        rsync_common = [
             '-e', self.ssh_cmd,    # SSH command with identity file
-            '--archive',           # Archive mode (preserves permissions, timestamps)
-            '--compress',          # Compress during transfer
             '--partial',           # Keep partial transfers
             '--partial-dir=.rsync-partial',  # Partial transfer directory
             '--timeout=600',       # 10 minute timeout
             '--quiet'              # Reduce output
         ]
+        # Directory syncs keep full archive semantics; plain file uploads
+        # only need mtimes - ownership and permissions are set by the
+        # receiving user anyway, so -rlptgoD just adds attr round-trips
+        self.rsync_options_dir = rsync_common + ['--archive']
+        self.rsync_options_file = rsync_common + ['--times']
+        # Kept for existing call sites that sync directories
+        self.rsync_options = self.rsync_options_dir
+        
+        # rsync >= 3.2.3 can create the destination path as part of the
+        # transfer, removing the separate ssh mkdir round-trip entirely
+        self._have_mkpath = self._probe_mkpath()
+        if self._have_mkpath:
+            self.rsync_options_dir.append('--mkpath')
+            self.rsync_options_file.append('--mkpath')
         
         self._test_connection()
     
+    def _probe_mkpath(self) -> bool:
+        """Check whether the local rsync supports --mkpath (>= 3.2.3)"""
+        try:
+            result = subprocess.run(
+                ['rsync', '--version'],
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+            match = re.search(r'version\s+(\d+)\.(\d+)\.(\d+)', result.stdout)
+            if match:
+                return tuple(int(g) for g in match.groups()) >= (3, 2, 3)
+        except Exception as e:
+            logger.debug(f"Could not probe rsync version: {e}")
+        return False
+    
     def _test_connection(self):
         """Test rsync connection to target server"""
         try:
@@ -100,19 +149,26 @@ class RsyncStorageManager:
             logger.warning(f"Could not test rsync connection: {e}")
     
     def _build_ssh_command(self, remote_cmd: List[str]) -> List[str]:
-        """Build SSH command with identity file"""
-        cmd = ['ssh']
-        if self.ssh_key_path:
-            cmd.extend(['-i', os.path.expanduser(self.ssh_key_path)])
-        cmd.extend([
-            '-o', 'StrictHostKeyChecking=no',
-            '-o', 'UserKnownHostsFile=/dev/null',
-            '-o', 'BatchMode=yes',
-            f"{self.rsync_user}@{self.db_host}"
-        ])
+        """Build SSH command with identity file and connection multiplexing"""
+        cmd = ['ssh'] + self._ssh_options + [f"{self.rsync_user}@{self.db_host}"]
         cmd.extend(remote_cmd)
         return cmd
     
+    def close(self):
+        """Tear down the shared SSH master connection"""
+        try:
+            subprocess.run(
+                ['ssh', '-O', 'exit', '-o', f'ControlPath={self._control_path}',
+                 f"{self.rsync_user}@{self.db_host}"],
+                capture_output=True,
+                timeout=10
+            )
+        except Exception:
+            pass
+    
+    def __del__(self):
+        self.close()
+    
     def upload_file(self, local_path: Path, remote_path: str) -> bool:
         """
         Upload single file using rsync
@@ -131,26 +187,29 @@ class RsyncStorageManager:
         # Construct full remote path
         full_remote_path = f"{self.rsync_user}@{self.db_host}:{self.storage_root}/{remote_path}"
         
-        # Ensure remote directory exists
-        remote_dir = str(Path(remote_path).parent)
-        if not self._ensure_remote_directory(remote_dir):
-            logger.error(f"Failed to create remote directory: {remote_dir}")
-            return False
+        # Ensure remote directory exists (rsync does it itself with --mkpath)
+        if not self._have_mkpath:
+            remote_dir = str(Path(remote_path).parent)
+            if not self._ensure_remote_directory(remote_dir):
+                logger.error(f"Failed to create remote directory: {remote_dir}")
+                return False
         
         # Perform rsync transfer with retries
         for attempt in range(self.max_retries):
             try:
-                cmd = ['rsync'] + self.rsync_options + [
+                cmd = ['rsync'] + self.rsync_options_file + [
                     str(local_path),
                     full_remote_path
                 ]
                 
                 logger.debug(f"Rsync command: {' '.join(cmd)}")
                 
+                # Only capture stderr; stdout is discarded on success anyway
+                # and skipping the pipe + decode saves overhead per call
                 result = subprocess.run(
                     cmd,
-                    capture_output=True,
-                    text=True,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
                     timeout=600  # 10 minute timeout
                 )
                 
@@ -158,7 +217,8 @@ class RsyncStorageManager:
                     logger.info(f"Uploaded {local_path.name} to {remote_path}")
                     return True
                 else:
-                    logger.warning(f"Rsync attempt {attempt + 1} failed: {result.stderr}")
+                    stderr = result.stderr.decode(errors='replace')
+                    logger.warning(f"Rsync attempt {attempt + 1} failed: {stderr}")
                     
             except subprocess.TimeoutExpired:
                 logger.warning(f"Rsync timeout on attempt {attempt + 1} for {local_path.name}")
@@ -174,11 +234,17 @@ class RsyncStorageManager:
     
     def upload_batch(self, file_pairs: List[Tuple[Path, str]], max_workers: int = 4) -> List[bool]:
         """
-        Upload multiple files in parallel
+        Upload multiple files with one rsync invocation per destination
+        directory
+        
+        Instead of forking one rsync (and one SSH session) per file, the
+        batch is grouped by remote directory and each group is handed to a
+        single rsync via --files-from, so an entire manifest streams over
+        one connection.
         
         Args:
             file_pairs: List of (local_path, remote_path) tuples
-            max_workers: Maximum parallel transfers
+            max_workers: Maximum parallel rsync invocations
             
         Returns:
             List[bool]: Success status for each file
@@ -188,40 +254,118 @@ class RsyncStorageManager:
         
         logger.info(f"Starting batch upload of {len(file_pairs)} files with {max_workers} workers")
         
+        results = [False] * len(file_pairs)
+        
+        # Group files by destination directory
+        groups: Dict[str, List[int]] = {}
+        for idx, (local_path, remote_path) in enumerate(file_pairs):
+            if not local_path.exists():
+                logger.error(f"Local file does not exist: {local_path}")
+                continue
+            groups.setdefault(str(Path(remote_path).parent), []).append(idx)
+        
+        # Run the per-directory rsyncs concurrently and harvest them as they
+        # finish - collecting results in submission order would leave workers
+        # idle behind one slow straggler and delay failure logging
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [
-                executor.submit(self.upload_file, local_path, remote_path)
-                for local_path, remote_path in file_pairs
-            ]
+            futures = {}
+            for remote_dir, indices in groups.items():
+                if not self._have_mkpath and not self._ensure_remote_directory(remote_dir):
+                    logger.error(f"Failed to create remote directory: {remote_dir}")
+                    continue
+                future = executor.submit(
+                    self._upload_manifest,
+                    [file_pairs[i][0] for i in indices], remote_dir
+                )
+                futures[future] = indices
             
-            results = [future.result() for future in futures]
+            for future in as_completed(futures):
+                indices = futures[future]
+                try:
+                    success = future.result()
+                except Exception as e:
+                    logger.error(f"Batch upload worker failed: {e}")
+                    success = False
+                for i in indices:
+                    results[i] = success
         
         successful = sum(results)
         logger.info(f"Batch upload complete: {successful}/{len(file_pairs)} successful")
         
         return results
     
+    def _upload_manifest(self, local_paths: List[Path], remote_dir: str) -> bool:
+        """Upload a list of files into one remote directory with one rsync"""
+        for attempt in range(self.max_retries):
+            try:
+                # NUL-separated manifest so arbitrary filenames are safe
+                with tempfile.NamedTemporaryFile('wb', suffix='.manifest') as manifest:
+                    for path in local_paths:
+                        manifest.write(os.fsencode(str(path.resolve())) + b'\0')
+                    manifest.flush()
+                    
+                    cmd = ['rsync'] + self.rsync_options_file + [
+                        '--from0',
+                        f'--files-from={manifest.name}',
+                        '--no-relative',
+                        '/',
+                        f"{self.rsync_user}@{self.db_host}:{self.storage_root}/{remote_dir}/"
+                    ]
+                    
+                    result = subprocess.run(
+                        cmd,
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.PIPE,
+                        timeout=3600
+                    )
+                
+                if result.returncode == 0:
+                    logger.info(f"Uploaded {len(local_paths)} files to {remote_dir}")
+                    return True
+                else:
+                    stderr = result.stderr.decode(errors='replace')
+                    logger.warning(f"Batch rsync attempt {attempt + 1} failed: {stderr}")
+                    
+            except subprocess.TimeoutExpired:
+                logger.warning(f"Batch rsync timeout on attempt {attempt + 1} for {remote_dir}")
+            except Exception as e:
+                logger.warning(f"Batch rsync error on attempt {attempt + 1}: {e}")
+            
+            # Wait before retry
+            if attempt < self.max_retries - 1:
+                time.sleep(2 ** attempt)  # Exponential backoff
+        
+        logger.error(f"Failed to upload batch to {remote_dir} after {self.max_retries} attempts")
+        return False
+    
     def _ensure_remote_directory(self, remote_dir: str) -> bool:
-        """Ensure remote directory exists"""
+        """Ensure remote directory exists (memoized per manager instance)"""
         if remote_dir in ['', '.']:
             return True
-            
+        
+        with self._dir_lock:
+            if remote_dir in self._dir_cache:
+                return True
+        
         try:
             # Use ssh to create directory
             cmd = self._build_ssh_command([f"mkdir -p {self.storage_root}/{remote_dir}"])
             
             result = subprocess.run(
                 cmd,
-                capture_output=True,
-                text=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
                 timeout=30
             )
             
             if result.returncode == 0:
                 logger.debug(f"Created remote directory: {remote_dir}")
+                with self._dir_lock:
+                    self._dir_cache.add(remote_dir)
                 return True
             else:
-                logger.error(f"Failed to create remote directory {remote_dir}: {result.stderr}")
+                stderr = result.stderr.decode(errors='replace')
+                logger.error(f"Failed to create remote directory {remote_dir}: {stderr}")
                 return False
                 
         except Exception as e:
@@ -257,9 +401,11 @@ class RsyncStorageManager:
         try:
             cmd = self._build_ssh_command([f"test -f {self.storage_root}/{remote_path}"])
             
+            # Only the exit code matters here
             result = subprocess.run(
                 cmd,
-                capture_output=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
                 timeout=30
             )
             